@@ -2,42 +2,68 @@
 
 from __future__ import annotations
 import argparse
-from datetime import datetime as _dt
-from typing import Optional, Dict, Any, List
+import logging
+import os
+import pathlib
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from itertools import product
+from typing import Optional, Dict, Any, List, Tuple
 
+import numpy as np
 import pandas as pd
 import backtrader as bt
+from threadpoolctl import threadpool_limits
 from logger_setup import get_logger
 
-from config import INITIAL_CASH
-from data_ingestion import load_price_data
-from strategy import MLTradingStrategy
+from config import INITIAL_CASH, MODEL_PATH
+from data_ingestion import OHLCV_COLS, load_price_panel
+from feature_engineering import indicator_lines
+from strategy import IndicatorFeed, MLTradingStrategy, load_booster
 from tax_analyzer import TaxAnalyzer
+from utils.trade_recorder import TradeRecorder
 
 log = get_logger(__name__)
 
 
-# ──────────────────────────────────────────────────────────────────────
-def run_once(
-    *,
-    start_date: Optional[str] = None,
-    end_date:   Optional[str] = None,
-    tickers:    Optional[List[str]] = None,
-    **params: Any,          # p_long, p_short, min_edge, trade_shorts, …
-) -> Dict[str, Any]:
-    """Run a single back-test and return a metrics dict."""
-
-    # ── time window (full-day inclusive) ────────────────────────────
+def _window(start_date: Optional[str], end_date: Optional[str]):
+    """Parse the CLI/sweep date strings into an inclusive full-day window."""
     fd = pd.to_datetime(start_date) if start_date else None
     td = (
         pd.to_datetime(end_date) + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
         if end_date else None
     )
+    return fd, td
 
-    hp_str = " ".join(f"{k}={v!r}" for k, v in params.items())
 
-    # ── Cerebro core ────────────────────────────────────────────────
-    cerebro = bt.Cerebro()
+# ── per-process price cache ──────────────────────────────────────────
+def _preload_data(
+    tickers: Optional[List[str]],
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> None:
+    """ProcessPoolExecutor initializer: warm the worker's price + model cache."""
+    threadpool_limits(1)        # one core per worker; no nested OpenMP/BLAS pools
+    load_price_panel(tickers, *_window(start_date, end_date))
+    load_booster(MODEL_PATH)
+
+
+class _FinalValue(bt.Analyzer):
+    """Broker value at the end of the run (survives optreturn pickling)."""
+
+    def stop(self):
+        self.value = self.strategy.broker.getvalue()
+
+    def get_analysis(self):
+        return {"final": self.value}
+
+
+BROKER_PARAMS = ("slip_perc", "tax_rate")     # run params _make_cerebro consumes
+
+
+def _make_cerebro(params: Dict[str, Any], **kwargs: Any) -> bt.Cerebro:
+    """Cerebro with the broker settings and analyzers every run shares."""
+    cerebro = bt.Cerebro(**kwargs)
     cerebro.broker.setcash(INITIAL_CASH)
     cerebro.broker.setcommission(leverage=1.0)
 
@@ -47,70 +73,66 @@ def run_once(
     cerebro.broker.set_shortcash(False)
 
     cerebro.addanalyzer(TaxAnalyzer, _name="tax", rate=params.get("tax_rate", 0.24))
+    cerebro.addanalyzer(_FinalValue,               _name="value")
+    cerebro.addanalyzer(bt.analyzers.SharpeRatio,  _name="sharpe")
+    cerebro.addanalyzer(bt.analyzers.DrawDown,     _name="dd")
+    cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name="trades")
+    cerebro.addanalyzer(TradeRecorder,             _name="rec")   # trade log
+    return cerebro
 
-    # ── load once, then slice & clean ───────────────────────────────
-    price_data = load_price_data(tickers)
-    for tkr, df in price_data.items():
-        if getattr(df.index, "tz", None):
-            df = df.tz_localize(None)
 
-        if fd is not None or td is not None:
-            df = df.loc[fd:td]
+def prepare_feeds(
+    tickers: Optional[List[str]],
+    fd: Optional[pd.Timestamp],
+    td: Optional[pd.Timestamp],
+    min_bars: int = 30,
+    panel: Optional[Tuple[List[str], pd.DatetimeIndex, np.ndarray]] = None,
+) -> List[bt.feeds.PandasData]:
+    """Slice the cached panel to [fd, td] and wrap each ticker as a feed
+    (OHLCV plus the strategy's precomputed indicators).
 
-        df = df[
-            (df["Close"] >= 1.0)
-            & (df["Volume"] > 0)
-        ].dropna(subset=["Open", "High", "Low", "Close", "Volume"])
-        df = df[~df.index.duplicated(keep="last")]
+    *panel* is a ``load_price_panel``-style tuple already in memory (e.g.
+    ``utils.data_cache.load_panel``); *tickers* is ignored when given.
+    """
+    # ── load once (already cleaned), slice the whole panel ──────────
+    names, times, ohlcv = panel if panel is not None else load_price_panel(tickers, fd, td)
+    ts = times.asi8                                  # int64 ns view, sorted
+    lo = 0 if fd is None else ts.searchsorted(fd.value)
+    hi = len(ts) if td is None else ts.searchsorted(td.value, side="right")
+    times, ohlcv = times[lo:hi], ohlcv[lo:hi]
 
-        if len(df) < params.get("min_bars", 30):
-            continue
+    def _prep_one(i: int) -> Optional[bt.feeds.PandasData]:
+        block = ohlcv[:, i, :]
+        rows = ~np.isnan(block).any(axis=1)      # NaN ⇒ bar missing for tkr
+        if rows.sum() < min_bars:
+            return None
+        df = pd.DataFrame(block[rows], index=times[rows], columns=OHLCV_COLS)
+        # strategy indicators are computed here, once per feed, not per run
+        ind = indicator_lines(df)
+        return IndicatorFeed(dataname=df, indicators=ind,
+                             indicator_block=np.ascontiguousarray(ind.to_numpy(np.float32).T),
+                             name=names[i], fromdate=fd, todate=td)
 
-        cerebro.adddata(
-            bt.feeds.PandasData(dataname=df, name=tkr, fromdate=fd, todate=td)
-        )
-    
-    #Feed coverage summary
-    coverage = [
-        (d._name,
-         d.datetime.date(0),
-         d.datetime.date(-1),
-         len(d))
-        for d in cerebro.datas
-    ]
-    if coverage:
+    # NumPy/pandas release the GIL; map() keeps ticker order deterministic
+    with ThreadPoolExecutor() as ex:
+        feeds = [f for f in ex.map(_prep_one, range(len(names))) if f is not None]
+
+    #Feed coverage summary (taken from the frames – feeds are empty until run)
+    if feeds:
+        first = feeds[0].p.dataname
         log.info(
             "Coverage sample: %s → %s  (%d bars) … (+%d more feeds)",
-            coverage[0][0],                              # ticker name
-            f"{coverage[0][1]}→{coverage[0][2]}",         # dates
-            coverage[0][3],                              # bar count
-            len(coverage)-1                              # remaining feeds
+            feeds[0]._name,                                       # ticker name
+            f"{first.index[0].date()}→{first.index[-1].date()}",  # dates
+            len(first),                                           # bar count
+            len(feeds)-1                                          # remaining feeds
         )
+    return feeds
 
-    if not cerebro.datas:
-        log.warning("No data feeds for %s → %s; skipped.", fd, td)
-        return {
-            "start": fd, "end": td, "final": None, "sharpe": None,
-            "mdd": None, "trades": 0, "cagr": None,
-            "gross_pnl": None, "tax_paid": None, "net_after_tax": None,
-        }
-
-    log.info("→ Running on %d tickers", len(cerebro.datas))
-
-    # ── strategy & analyzers ────────────────────────────────────────
-    cerebro.addstrategy(MLTradingStrategy, **params)
-    cerebro.addanalyzer(bt.analyzers.SharpeRatio,  _name="sharpe")
-    cerebro.addanalyzer(bt.analyzers.DrawDown,     _name="dd")
-    cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name="trades")
-
-    # Trade recording
-    from utils.trade_recorder import TradeRecorder
-    cerebro.addanalyzer(TradeRecorder, _name="rec")
-
-    strat = cerebro.run()[0]
 
-    # ── metrics ─────────────────────────────────────────────────────
-    final  = cerebro.broker.getvalue()
+def _metrics(strat, fd, td, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Collect the results dict from a finished strategy (or OptReturn)."""
+    final  = strat.analyzers.value.get_analysis()["final"]
     sharpe = strat.analyzers.sharpe.get_analysis().get("sharperatio")
     mdd    = strat.analyzers.dd.get_analysis()["max"]["drawdown"]
     trades = strat.analyzers.trades.get_analysis().get("total", {}).get("closed", 0)
@@ -118,12 +140,11 @@ def run_once(
     trade_log = strat.analyzers.rec.get_analysis()["trades"]
 
     # write once per run
-    if trade_log:
-        import uuid, pathlib, pandas as pd
+    if len(trade_log):
         out = pathlib.Path("logs")
         out.mkdir(exist_ok=True)
         csv_path = out / f"trades_{uuid.uuid4().hex[:8]}.csv"
-        pd.DataFrame(trade_log).to_csv(csv_path, index=False)
+        trade_log.to_csv(csv_path, index=False)
         log.info("Trade log written ➜ %s  (%d rows)", csv_path, len(trade_log))
 
     if fd is not None and td is not None and final > 0 and (td - fd).days >= 30:
@@ -143,19 +164,162 @@ def run_once(
         **tax,
     }
 
-    log.info(
-        "Run [%s→%s] %s → Final %.2f  CAGR %s  Sharpe %s  MaxDD %.2f%%  Trades %d",
-        fd or "BEGIN", td or "END",
-        hp_str,
-        final,
-        f"{cagr:.2%}"   if cagr   is not None else "nan",
-        f"{sharpe:.3f}" if sharpe is not None else "nan",
-        mdd,
-        trades,
-    )
+    # formatting only pays off when INFO is on (sweeps often silence it)
+    if log.isEnabledFor(logging.INFO):
+        log.info(
+            "Run [%s→%s] %s → Final %.2f  CAGR %s  Sharpe %s  MaxDD %.2f%%  Trades %d",
+            fd or "BEGIN", td or "END",
+            " ".join(f"{k}={v!r}" for k, v in params.items()),
+            final,
+            f"{cagr:.2%}"   if cagr   is not None else "nan",
+            f"{sharpe:.3f}" if sharpe is not None else "nan",
+            mdd,
+            trades,
+        )
     return results
 
 
+def _empty_result(fd, td) -> Dict[str, Any]:
+    log.warning("No data feeds for %s → %s; skipped.", fd, td)
+    return {
+        "start": fd, "end": td, "final": None, "sharpe": None,
+        "mdd": None, "trades": 0, "cagr": None,
+        "gross_pnl": None, "tax_paid": None, "net_after_tax": None,
+    }
+
+
+class Session:
+    """One Cerebro – feeds, broker settings, analyzers – kept across runs.
+
+    ``run(**params)`` swaps in a fresh strategy config and re-runs; the broker
+    and feeds are reset by backtrader on every ``cerebro.run()``.  *broker*
+    holds the ``_make_cerebro`` settings (``BROKER_PARAMS``), so a session
+    serves every config that shares them.
+    """
+
+    def __init__(self, feeds: List[bt.feeds.PandasData], fd, td,
+                 broker: Optional[Dict[str, Any]] = None):
+        self.fd, self.td = fd, td
+        self.cerebro = _make_cerebro(broker or {})
+        for feed in feeds:
+            self.cerebro.adddata(feed)
+
+    def run(self, **params: Any) -> Dict[str, Any]:
+        self.cerebro.strats.clear()
+        self.cerebro.addstrategy(MLTradingStrategy, **params)
+        strat = self.cerebro.run()[0]
+        return _metrics(strat, self.fd, self.td, params)
+
+
+# ──────────────────────────────────────────────────────────────────────
+def run_once(
+    *,
+    start_date: Optional[str] = None,
+    end_date:   Optional[str] = None,
+    tickers:    Optional[List[str]] = None,
+    feeds:      Optional[List[bt.feeds.PandasData]] = None,
+    prefetched: Optional[Tuple[List[str], pd.DatetimeIndex, np.ndarray]] = None,
+    **params: Any,          # p_long, p_short, min_edge, trade_shorts, …
+) -> Dict[str, Any]:
+    """Run a single back-test and return a metrics dict.
+
+    *feeds* may be passed in from ``prepare_feeds`` (for the same window)
+    so repeated runs skip rebuilding them; backtrader resets each feed
+    when a new Cerebro runs it.  Otherwise *prefetched* – a price panel
+    already in memory – replaces the internal ``load_price_panel`` read.
+    """
+
+    # ── time window (full-day inclusive) ────────────────────────────
+    fd, td = _window(start_date, end_date)
+
+    if feeds is None:
+        feeds = prepare_feeds(tickers, fd, td, params.get("min_bars", 30),
+                              panel=prefetched)
+    if not feeds:
+        return _empty_result(fd, td)
+
+    log.info("→ Running on %d tickers", len(feeds))
+    return Session(feeds, fd, td, params).run(**params)
+
+
+# ──────────────────────────────────────────────────────────────────────
+def run_optimization(
+    param_grid: Dict[str, List[Any]],
+    start_date: Optional[str] = None,
+    end_date:   Optional[str] = None,
+    tickers:    Optional[List[str]] = None,
+    maxcpus:    Optional[int] = None,
+) -> pd.DataFrame:
+    """Sweep strategy-only hyper-parameters with ``cerebro.optstrategy``.
+
+    Feeds are built and preloaded once and shared by every strategy
+    instance (backtrader forks them across *maxcpus* processes).  Only
+    strategy params may vary here; use ``run_sweep`` for broker settings
+    such as ``slip_perc`` or ``tax_rate``.
+    """
+    fd, td = _window(start_date, end_date)
+    feeds = prepare_feeds(tickers, fd, td)
+    if not feeds:
+        return pd.DataFrame([_empty_result(fd, td)])
+
+    log.info("→ Optimising on %d tickers", len(feeds))
+
+    cerebro = _make_cerebro({}, stdstats=False)     # observers only plot and don't pickle
+    for feed in feeds:
+        cerebro.adddata(feed)
+    cerebro.optstrategy(MLTradingStrategy, **param_grid)
+
+    # backtrader's Pool has no initializer; forked workers inherit this limit
+    with threadpool_limits(1):
+        runs = cerebro.run(optreturn=True, maxcpus=maxcpus or os.cpu_count())
+
+    rows: List[Dict[str, Any]] = []
+    for (strat,) in runs:
+        cfg = {k: getattr(strat.p, k) for k in param_grid}
+        rows.append({**cfg, **_metrics(strat, fd, td, cfg)})
+    return pd.DataFrame(rows)
+
+
+# ──────────────────────────────────────────────────────────────────────
+def run_sweep(
+    param_grid: Dict[str, List[Any]],
+    start_date: Optional[str] = None,
+    end_date:   Optional[str] = None,
+    tickers:    Optional[List[str]] = None,
+    max_workers: Optional[int] = None,
+) -> pd.DataFrame:
+    """Back-test every combination in *param_grid* across CPU cores.
+
+    Each worker process loads the price data once (via ``_preload_data``)
+    and reuses it for every ``run_once`` it executes.  Returns one row per
+    config: the hyper-parameters followed by the ``run_once`` metrics.
+    """
+    keys = list(param_grid)
+    cfgs = [dict(zip(keys, vals)) for vals in product(*(param_grid[k] for k in keys))]
+
+    rows: List[Dict[str, Any]] = []
+    with ProcessPoolExecutor(
+        max_workers=max_workers or os.cpu_count(),
+        initializer=_preload_data,
+        initargs=(tickers, start_date, end_date),
+    ) as ex:
+        futs = {
+            ex.submit(run_once, start_date=start_date, end_date=end_date,
+                      tickers=tickers, **cfg): cfg
+            for cfg in cfgs
+        }
+        for fut in as_completed(futs):
+            cfg = futs[fut]
+            try:
+                rows.append({**cfg, **fut.result()})
+            except Exception as e:
+                log.error("Fail %s : %s", cfg, e)
+                rows.append({**cfg, "final": None})
+
+    log.info("Sweep finished: %d configs", len(rows))
+    return pd.DataFrame(rows)
+
+
 # ── CLI helper ───────────────────────────────────────────────────────
 if __name__ == "__main__":
     p = argparse.ArgumentParser(description="Run one back-test")
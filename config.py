@@ -21,9 +21,17 @@ MAX_SECTOR_POSITIONS = 3
 TRAIL_PERCENT = 0.05
 MIN_EDGE = 0.0005        # minimum probability edge (50.05%) to cover slippage
 
+# ─── Cache paths ───────────────────────────────────────────────────
+FEATURE_CACHE_DIR = os.path.join(PROJECT_ROOT, "cache", "features")   # per‑ticker feature parquet
+PANEL_CACHE_DIR = os.path.join(PROJECT_ROOT, "cache", "panels")       # per‑universe price panels
+SWEEP_CACHE_DIR = os.path.join(PROJECT_ROOT, "cache", "sweep")        # finished sweep result rows
+
+# ─── Universe lists ─────────────────────────────────────────────────
+UNIVERSE_DIR = os.path.join(PROJECT_ROOT, "universe")                 # <name>.csv with a symbol column
+
 # ─── Model output path ─────────────────────────────────────────────
 MODEL_DIR = os.path.join(PROJECT_ROOT, "models")
-MODEL_PATH = os.path.join(MODEL_DIR, "trained_model.pkl")
+MODEL_PATH = os.path.join(MODEL_DIR, "trained_model.txt")   # LightGBM text model
 
 # ─── Alpaca credentials ───────────────────────────────────────────── ─────────────────────────────────────────────
 ALPACA_API_KEY = os.getenv("ALPACA_API_KEY", "")
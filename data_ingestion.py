@@ -6,28 +6,75 @@
 • If DATA_DIR already holds aggregated bars, they’re loaded as‑is.
 
 All column names are normalised to Title‑case so downstream code can assume
-`Open/High/Low/Close/Volume`.
+`Open/High/Low/Close/Volume`.  Bars with Close < 1, zero volume, NaNs or a
+duplicated timestamp are dropped at load time.
+
+Results are memoised per ticker set and window (`load_price_data.cache_clear()`
+resets), so callers must treat the returned frames as read‑only.
 """
 from __future__ import annotations
 
-import os
-from typing import Dict, List
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Tuple
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
 from config import DATA_DIR, RESAMPLE_MINUTES
+from utils._njit import HAVE_NUMBA, njit
 
 # ─────────────────────────────────────────────────────────────────────
 
 REQUIRED_COLS = {"Open", "High", "Low", "Close", "Volume"}
+OHLCV_COLS = ["Open", "High", "Low", "Close", "Volume"]   # panel field order
+
+
+def _scan_parquet(data_dir: str) -> Dict[str, Path]:
+    """Map ticker → parquet path for every *.parquet file in *data_dir*."""
+    root = Path(data_dir)
+    if not root.is_dir():
+        return {}
+    return {p.stem: p for p in root.iterdir() if p.suffix == ".parquet"}
+
+
+# scanned once at import; refreshed by load_price_data.cache_clear()
+_PARQUET_PATHS: Dict[str, Path] = _scan_parquet(DATA_DIR)
 
 
 def _list_tickers() -> List[str]:
     """Return ticker symbols from *.parquet filenames in DATA_DIR."""
-    return sorted(os.path.splitext(f)[0] for f in os.listdir(DATA_DIR) if f.endswith(".parquet"))
+    return sorted(_PARQUET_PATHS)
+
+
+def _read_parquet(fp: Path, start: pd.Timestamp | None, end: pd.Timestamp | None) -> pd.DataFrame:
+    """Read only Date + OHLCV, pushing the date window down into the scan.
+
+    The pushed filter is padded by a day (tz offsets, right‑labelled bins);
+    callers still slice the exact window afterwards.
+    """
+    dset = ds.dataset(fp, format="parquet")
+    names = {n.title(): n for n in dset.schema.names}
+    date_col = next((names[c] for c in ("Date", "Timestamp", "Datetime") if c in names), None)
+    columns = [names[c] for c in OHLCV_COLS if c in names]
+    if date_col is None:
+        return dset.to_table(columns=columns).to_pandas()
+
+    flt = None
+    typ = dset.schema.field(date_col).type
+    if pa.types.is_timestamp(typ):
+        if start is not None:
+            lo = pa.scalar((start - pd.Timedelta(days=1)).normalize().to_pydatetime(), type=typ)
+            flt = ds.field(date_col) >= lo
+        if end is not None:
+            hi = pa.scalar((end + pd.Timedelta(days=2)).normalize().to_pydatetime(), type=typ)
+            flt = ds.field(date_col) < hi if flt is None else flt & (ds.field(date_col) < hi)
+    return dset.to_table(columns=[date_col, *columns], filter=flt).to_pandas()
 
 
 def _norm_cols(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
+    """Normalise column labels in place – *df* is a fresh read, no copy needed."""
     df.columns = [c.title() for c in df.columns]
     for alt in ("Timestamp", "Datetime"):
         if alt in df.columns and "Date" not in df.columns:
@@ -38,9 +85,59 @@ def _norm_cols(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+@njit(cache=True)
+def _ohlc_bins(starts, o, h, l, c):
+    """First/max/min/last per bin (NaN‑skipping), bins given by *starts*."""
+    nb = starts.size
+    n = o.size
+    oo = np.full(nb, np.nan)
+    hh = np.full(nb, np.nan)
+    ll = np.full(nb, np.nan)
+    cc = np.full(nb, np.nan)
+    for b in range(nb):
+        end = starts[b + 1] if b + 1 < nb else n
+        for i in range(starts[b], end):
+            if oo[b] != oo[b] and o[i] == o[i]:
+                oo[b] = o[i]
+            if h[i] == h[i] and not h[i] <= hh[b]:
+                hh[b] = h[i]
+            if l[i] == l[i] and not l[i] >= ll[b]:
+                ll[b] = l[i]
+            if c[i] == c[i]:
+                cc[b] = c[i]
+    return oo, hh, ll, cc
+
+
+def _aggregate_nb(df: pd.DataFrame, minutes: int | None) -> pd.DataFrame:
+    """NumPy/numba equivalent of the right‑closed, right‑labelled resample."""
+    ts = df.index.asi8
+    order = np.argsort(ts, kind="stable")
+    ts = ts[order]
+
+    # bins are (label − width, label], anchored at midnight of the first day
+    width = (minutes or 1440) * 60 * 10**9
+    origin = ts[0] - ts[0] % (86_400 * 10**9)
+    labels = origin - ((origin - ts) // width) * width
+    starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+
+    cols = [df[c].to_numpy(dtype=np.float64)[order] for c in ("Open", "High", "Low", "Close")]
+    o, h, l, c = _ohlc_bins(starts, *cols)
+    vol = df["Volume"].to_numpy()[order]
+    if vol.dtype.kind == "f":
+        vol = np.nan_to_num(vol)
+
+    out = pd.DataFrame(
+        {"Open": o, "High": h, "Low": l, "Close": c,
+         "Volume": np.add.reduceat(vol, starts)},
+        index=pd.DatetimeIndex(labels[starts], name="Date"),
+    )
+    return out.dropna()
+
+
 def _aggregate(df: pd.DataFrame, minutes: int | None) -> pd.DataFrame:
-    """Aggregate minute bars to *minutes*‑bars or daily if minutes is None."""
-    df = df.set_index(pd.to_datetime(df["Date"]))
+    """Aggregate Date‑indexed minute bars to *minutes*‑bars (daily if None)."""
+    if HAVE_NUMBA and len(df):
+        return _aggregate_nb(df, minutes)
     rule = f"{minutes}min" if minutes else "1D"
     agg = {
         "Open": "first",
@@ -54,28 +151,100 @@ def _aggregate(df: pd.DataFrame, minutes: int | None) -> pd.DataFrame:
     return out.sort_index()
 
 
-def load_price_data(tickers: List[str] | None = None) -> Dict[str, pd.DataFrame]:
+def load_price_data(
+    tickers: List[str] | None = None,
+    start: pd.Timestamp | None = None,
+    end: pd.Timestamp | None = None,
+) -> Dict[str, pd.DataFrame]:
+    """Load (roughly) *start*…*end* for *tickers*; None loads everything."""
+    return _load_cached(tuple(tickers) if tickers is not None else None, start, end)
+
+
+@lru_cache(maxsize=8)
+def _load_cached(
+    tickers: Tuple[str, ...] | None,
+    start: pd.Timestamp | None,
+    end: pd.Timestamp | None,
+) -> Dict[str, pd.DataFrame]:
     if tickers is None:
-        tickers = _list_tickers()
+        tickers = tuple(_list_tickers())
 
     data: Dict[str, pd.DataFrame] = {}
     for tkr in tickers:
-        fp = os.path.join(DATA_DIR, f"{tkr}.parquet")
-        raw = pd.read_parquet(fp)
-        raw = _norm_cols(raw)
+        fp = _PARQUET_PATHS.get(tkr) or Path(DATA_DIR) / f"{tkr}.parquet"
+        raw = _read_parquet(fp, start, end)
+        # files from scripts/reformat_parquet.py arrive Date‑indexed and
+        # Title‑cased; older layouts still need renaming and date parsing
+        if not isinstance(raw.index, pd.DatetimeIndex):
+            raw = _norm_cols(raw)
+            raw = raw.set_index(pd.DatetimeIndex(pd.to_datetime(raw.pop("Date")), name="Date"))
+
+        # drop tz once, keeping exchange wall‑clock time, so bins and cached
+        # frames never need a per‑run tz fix
+        if raw.index.tz is not None:
+            raw.index = raw.index.tz_localize(None)
 
         # Heuristic: duplicates in Date ⇒ minute bars
-        if raw["Date"].duplicated().any():
+        if raw.index.has_duplicates:
             df = _aggregate(raw, RESAMPLE_MINUTES)
         else:
-            raw["Date"] = pd.to_datetime(raw["Date"])
-            df = raw.set_index("Date").sort_index()
+            df = raw.sort_index()
             # If still minute‑level but unique timestamps and we WANT to resample:
             if RESAMPLE_MINUTES and (df.index.freq is None or df.index.freq < pd.Timedelta(f"{RESAMPLE_MINUTES}min")):
-                df = _aggregate(df.reset_index(), RESAMPLE_MINUTES)
+                df = _aggregate(df, RESAMPLE_MINUTES)
 
         missing = REQUIRED_COLS - set(df.columns)
         if missing:
             raise ValueError(f"{tkr}: missing {missing} after processing")
+
+        # bar hygiene – idempotent, so do it once here rather than per run
+        ohlcv = df[OHLCV_COLS].to_numpy()
+        df = df[(ohlcv[:, 3] >= 1.0) & (ohlcv[:, 4] > 0) & ~np.isnan(ohlcv).any(axis=1)]
+        # index is sorted, so duplicates are adjacent: keep the last of each run
+        ts = df.index.asi8
+        df = df[np.r_[ts[1:] != ts[:-1], True]] if len(ts) else df
+        # float32 is ample for bar prices/volume and halves memory traffic
+        df = df.astype({c: np.float32 for c in OHLCV_COLS})
         data[tkr] = df
-    return data
\ No newline at end of file
+    return data
+
+
+def load_price_panel(
+    tickers: List[str] | None = None,
+    start: pd.Timestamp | None = None,
+    end: pd.Timestamp | None = None,
+) -> Tuple[List[str], pd.DatetimeIndex, np.ndarray]:
+    """Stack the cleaned frames on one shared time axis.
+
+    Returns ``(tickers, times, ohlcv)`` where *ohlcv* is a float32 array of
+    shape ``(len(times), len(tickers), 5)`` in `OHLCV_COLS` order; bars a
+    ticker has no data for are NaN.  Memoised like `load_price_data`.
+    """
+    return _panel_cached(tuple(tickers) if tickers is not None else None, start, end)
+
+
+@lru_cache(maxsize=8)
+def _panel_cached(
+    tickers: Tuple[str, ...] | None,
+    start: pd.Timestamp | None,
+    end: pd.Timestamp | None,
+) -> Tuple[List[str], pd.DatetimeIndex, np.ndarray]:
+    data = _load_cached(tickers, start, end)
+    names = list(data)
+    if not names:
+        return names, pd.DatetimeIndex([], name="Date"), np.empty((0, 0, len(OHLCV_COLS)), np.float32)
+
+    wide = pd.concat([data[t][OHLCV_COLS] for t in names], axis=1, keys=names, sort=True)
+    ohlcv = wide.to_numpy(dtype=np.float32).reshape(len(wide), len(names), len(OHLCV_COLS))
+    return names, wide.index, ohlcv
+
+
+def _cache_clear() -> None:
+    _PARQUET_PATHS.clear()
+    _PARQUET_PATHS.update(_scan_parquet(DATA_DIR))
+    _load_cached.cache_clear()
+    _panel_cached.cache_clear()
+
+
+load_price_data.cache_clear = _cache_clear
+load_price_panel.cache_clear = _cache_clear
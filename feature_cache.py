@@ -0,0 +1,49 @@
+"""Disk cache for compute_features output (one parquet per ticker).
+
+Files are named features_<ticker>_<digest>.parquet where the digest covers
+the input bars (length, first/last timestamp, raw column bytes) and the
+source of feature_engineering.py, so any change to the bars *or* to the
+indicator windows/formulas misses the cache and rebuilds.
+"""
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import feature_engineering
+from config import FEATURE_CACHE_DIR
+from feature_engineering import compute_features
+
+_DIGEST_SIZE = 8                # bytes → 16 hex chars in the file name
+_CODE_DIGEST = hashlib.blake2b(
+    Path(feature_engineering.__file__).read_bytes(), digest_size=_DIGEST_SIZE
+).digest()
+
+
+def _digest(df: pd.DataFrame) -> str:
+    h = hashlib.blake2b(_CODE_DIGEST, digest_size=_DIGEST_SIZE)
+    h.update(f"{len(df)}|{df.index[0] if len(df) else ''}|{df.index[-1] if len(df) else ''}".encode())
+    h.update(",".join(df.columns).encode())
+    h.update(np.ascontiguousarray(df.to_numpy()).tobytes())
+    return h.hexdigest()
+
+
+def get_features(tkr: str, df: pd.DataFrame) -> pd.DataFrame:
+    """compute_features(df), read from / written to the parquet cache."""
+    cache_dir = Path(FEATURE_CACHE_DIR)
+    fp = cache_dir / f"features_{tkr}_{_digest(df)}.parquet"
+    if fp.exists():
+        return pd.read_parquet(fp)
+
+    feats = compute_features(df)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # exactly one digest after the ticker, so BRK never sweeps up BRK_B's files
+    for stale in cache_dir.glob(f"features_{tkr}_{'?' * 2 * _DIGEST_SIZE}.parquet"):
+        stale.unlink(missing_ok=True)
+    tmp = fp.with_suffix(".tmp")
+    feats.to_parquet(tmp)
+    tmp.replace(fp)
+    return feats
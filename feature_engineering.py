@@ -2,17 +2,280 @@
 import pandas as pd
 import numpy as np
 
+from utils._njit import HAVE_NUMBA, njit
+
+
+@njit(cache=True, fastmath=True)
+def _rsi_nb(close, period=14):
+    """Wilder RSI in one pass: seed with the mean of the first *period* moves,
+    then smooth as avg = (avg·(period−1) + new) / period (same as bt.ind.RSI).
+    """
+    n = close.size
+    out = np.full(n, np.nan)
+    avg_gain = avg_loss = 0.0
+    for i in range(1, n):
+        d = close[i] - close[i - 1]
+        gain = d if d > 0 else 0.0
+        loss = -d if d < 0 else 0.0
+        if i <= period:
+            avg_gain += gain / period
+            avg_loss += loss / period
+            if i < period:
+                continue
+        else:
+            avg_gain = (avg_gain * (period - 1) + gain) / period
+            avg_loss = (avg_loss * (period - 1) + loss) / period
+        if avg_loss > 0:
+            out[i] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+        elif avg_gain > 0:
+            out[i] = 100.0
+    return out
+
 
 def _rsi(series: pd.Series, period: int = 14) -> pd.Series:
-    delta = series.diff()
-    up, down = delta.clip(lower=0), -delta.clip(upper=0)
-    gain = up.rolling(period).mean()
-    loss = down.rolling(period).mean()
-    rs = gain / loss
-    return 100 - 100 / (1 + rs)
+    return pd.Series(_rsi_nb(series.to_numpy(dtype=np.float64), period), index=series.index)
+
+
+@njit(cache=True, fastmath=True)
+def _rolling_mean(x, w):
+    """O(N) rolling mean via a running sum; first w−1 values NaN."""
+    n = x.size
+    out = np.full(n, np.nan)
+    s = 0.0
+    for i in range(n):
+        s += x[i]
+        if i >= w:
+            s -= x[i - w]
+        if i >= w - 1:
+            out[i] = s / w
+    return out
+
+
+@njit(cache=True)
+def _rolling_std(x, w):
+    """O(N) rolling sample std (ddof=1) via sliding‑window Welford updates.
+
+    The window is re‑summed exactly every 1024 steps to stop rounding drift.
+    """
+    n = x.size
+    out = np.full(n, np.nan)
+    mean = m2 = 0.0
+    for i in range(w - 1, n):
+        if (i - w + 1) % 1024 == 0:
+            mean = 0.0
+            for j in range(i - w + 1, i + 1):
+                mean += x[j]
+            mean /= w
+            m2 = 0.0
+            for j in range(i - w + 1, i + 1):
+                m2 += (x[j] - mean) ** 2
+        else:
+            old, new = x[i - w], x[i]
+            prev = mean
+            mean += (new - old) / w
+            m2 += (new - old) * (new - mean + old - prev)
+        out[i] = np.sqrt(max(m2, 0.0) / (w - 1))
+    return out
+
+
+@njit(cache=True)
+def _rolling_vwap(close, volume, n):
+    """VWAP over the last *n* bars (n ≤ 0 → cumulative from the first bar).
+
+    NaN until the window is full or while it holds no volume.
+    """
+    size = close.size
+    out = np.full(size, np.nan)
+    pv = vol = 0.0
+    for i in range(size):
+        pv += close[i] * volume[i]
+        vol += volume[i]
+        if n > 0:
+            if i >= n:
+                pv -= close[i - n] * volume[i - n]
+                vol -= volume[i - n]
+            if i < n - 1:
+                continue
+        if vol != 0:
+            out[i] = pv / vol
+    return out
+
+
+@njit(cache=True, fastmath=True)
+def _features_loop(high, low, close, volume):
+    """One pass over the bars for every rolling/cumulative feature.
+
+    Mirrors the pandas path below (same windows, sample std, Wilder RSI,
+    cumulative VWAP); warm‑up rows are left NaN.
+    """
+    n = close.size
+    ret = np.full(n, np.nan)
+    ret1 = np.full(n, np.nan)
+    ret2 = np.full(n, np.nan)
+    ret5 = np.full(n, np.nan)
+    tr = np.empty(n)
+
+    for i in range(n):
+        c = close[i]
+        if i > 0:
+            prev = close[i - 1]
+            ret[i] = c / prev - 1.0
+            ret1[i] = ret[i - 1]
+            tr[i] = max(high[i] - low[i], abs(high[i] - prev), abs(low[i] - prev))
+        else:
+            tr[i] = high[i] - low[i]
+        if i >= 2:
+            ret2[i] = ret[i - 2]
+        if i >= 5:
+            ret5[i] = ret[i - 5]
+
+    sma5 = _rolling_mean(close, 5)
+    sma20 = _rolling_mean(close, 20)
+    bb_std = _rolling_std(close, 20)
+    rsi14 = _rsi_nb(close, 14)
+    atr14 = _rolling_mean(tr, 14)
+    vwap_gap = close / _rolling_vwap(close, volume, 0) - 1.0
+    return ret, ret1, ret2, ret5, sma5, sma20, bb_std, rsi14, atr14, vwap_gap
+
+
+# ── backtrader-equivalent indicator lines (strategy side) ─────────────
+INDICATOR_LINES = ("sma5", "sma20", "rsi14", "bb_upper", "bb_lower",
+                   "ret1", "ret2", "ret5", "atr14", "vg")
+
+
+@njit(cache=True, nogil=True)
+def _window_sum(x, w):
+    """Sum of the last *w* values, each window compensated (≈ math.fsum,
+    which backtrader's SMA/SumN use); first w−1 values NaN."""
+    n = x.size
+    out = np.full(n, np.nan)
+    for i in range(w - 1, n):
+        s = c = 0.0
+        for j in range(i - w + 1, i + 1):
+            v = x[j]
+            t = s + v
+            if abs(s) >= abs(v):
+                c += (s - t) + v
+            else:
+                c += (v - t) + s
+            s = t
+        out[i] = s + c
+    return out
+
+
+@njit(cache=True, nogil=True)
+def _smma(x, period, first):
+    """bt SmoothedMovingAverage of x[first:]: seeded with the mean of the
+    first *period* values, then prev·(1 − 1/period) + x·(1/period)."""
+    n = x.size
+    out = np.full(n, np.nan)
+    seed = first + period - 1
+    if seed >= n:
+        return out
+    prev = _window_sum(x[first:seed + 1], period)[-1] / period
+    out[seed] = prev
+    alpha = 1.0 / period
+    alpha1 = 1.0 - alpha
+    for i in range(seed + 1, n):
+        prev = prev * alpha1 + x[i] * alpha
+        out[i] = prev
+    return out
+
+
+@njit(cache=True, nogil=True)
+def _indicator_lines_nb(high, low, close, volume):
+    n = close.size
+    sma5 = _window_sum(close, 5) / 5
+    sma20 = _window_sum(close, 20) / 20
+    # bt StdDev is the population std: sqrt(|mean(x²) − mean(x)²|)
+    dev = 2.0 * np.abs(_window_sum(close * close, 20) / 20 - sma20 ** 2) ** 0.5
+
+    ret1 = np.full(n, np.nan)
+    ret2 = np.full(n, np.nan)
+    ret5 = np.full(n, np.nan)
+    up = np.zeros(n)
+    down = np.zeros(n)
+    tr = np.zeros(n)
+    for i in range(1, n):
+        prev = close[i - 1]
+        ret1[i] = close[i] / prev - 1.0
+        if i >= 2:
+            ret2[i] = close[i] / close[i - 2] - 1.0
+        if i >= 5:
+            ret5[i] = close[i] / close[i - 5] - 1.0
+        up[i] = max(close[i] - prev, 0.0)
+        down[i] = max(prev - close[i], 0.0)
+        tr[i] = max(high[i], prev) - min(low[i], prev)
+
+    maup = _smma(up, 14, 1)
+    madown = _smma(down, 14, 1)
+    rsi14 = np.full(n, np.nan)
+    for i in range(n):
+        if madown[i] > 0:
+            rsi14[i] = 100.0 - 100.0 / (1.0 + maup[i] / madown[i])
+        elif maup[i] > 0:
+            rsi14[i] = 100.0
+
+    pv = _window_sum(close * volume, 20)
+    vol = _window_sum(volume, 20)
+    vg = np.full(n, np.nan)
+    for i in range(n):
+        if vol[i] != 0:
+            vg[i] = close[i] / (pv[i] / vol[i]) - 1.0
+
+    atr14 = _smma(tr, 14, 1)
+    return sma5, sma20, rsi14, sma20 + dev, sma20 - dev, ret1, ret2, ret5, atr14, vg
+
+
+def indicator_lines(df: pd.DataFrame) -> pd.DataFrame:
+    """The strategy's backtrader indicators (``INDICATOR_LINES``) for one feed.
+
+    Same definitions as the ``bt.ind`` graph in ``strategy._Indicators``:
+    Wilder (SMMA) RSI/ATR, population-std Bollinger bands, 20-bar VWAP gap.
+    Computed in float64, stored as float32 – the precision of the model's
+    feature matrix – so the frames kept per feed are half the size.  The
+    columns are views of one C-contiguous ``(len(INDICATOR_LINES), n_bars)``
+    block, so ``frame.to_numpy().T`` hands that block out without a copy.
+    """
+    cols = _indicator_lines_nb(
+        *(df[c].to_numpy(dtype=np.float64) for c in ("High", "Low", "Close", "Volume"))
+    )
+    block = np.empty((len(INDICATOR_LINES), len(df)), dtype=np.float32)
+    for row, c in zip(block, cols):
+        row[:] = c
+    return pd.DataFrame(block.T, index=df.index, columns=list(INDICATOR_LINES), copy=False)
+
+
+def _compute_features_nb(df: pd.DataFrame) -> pd.DataFrame:
+    ret, ret1, ret2, ret5, sma5, sma20, bb_std, rsi14, atr14, vwap_gap = _features_loop(
+        *(df[c].to_numpy(dtype=np.float64) for c in ("High", "Low", "Close", "Volume"))
+    )
+    minutes = (df.index.hour * 60 + df.index.minute).to_numpy()
+    feats = pd.DataFrame({
+        "Return": ret,
+        "SMA_5": sma5,
+        "SMA_20": sma20,
+        "RSI_14": rsi14,
+        "BB_MID": sma20,
+        "BB_STD": bb_std,
+        "BB_UPPER": sma20 + 2 * bb_std,
+        "BB_LOWER": sma20 - 2 * bb_std,
+        "Return_1": ret1,
+        "Return_2": ret2,
+        "Return_5": ret5,
+        "ATR_14": atr14,
+        "Mom_1": ret,
+        "TOD_sin": np.sin(2 * np.pi * minutes / 1440),
+        "TOD_cos": np.cos(2 * np.pi * minutes / 1440),
+        "VWAP_gap": vwap_gap,
+    }, index=df.index)
+    return pd.concat([df, feats], axis=1).dropna()
 
 
 def compute_features(df: pd.DataFrame) -> pd.DataFrame:
+    if HAVE_NUMBA and isinstance(df.index, pd.DatetimeIndex) and "Volume" in df.columns:
+        return _compute_features_nb(df)
+
     out = df.copy()
     out["Return"] = out["Close"].pct_change()
     out["SMA_5"] = out["Close"].rolling(5).mean()
@@ -28,13 +291,12 @@ def compute_features(df: pd.DataFrame) -> pd.DataFrame:
     out["Return_5"] = out["Return"].shift(5)
     
     # 7. ATR (Average True Range) – 14 periods
-    hi, lo, cl = df["High"], df["Low"], df["Close"]
-    tr = pd.concat([
-        hi - lo,
-        (hi - cl.shift(1)).abs(),
-        (lo - cl.shift(1)).abs()
-    ], axis=1).max(axis=1)
-    out["ATR_14"] = tr.rolling(14).mean()
+    hi, lo, cl = (df[c].to_numpy(dtype=np.float64) for c in ("High", "Low", "Close"))
+    tr = hi - lo
+    if len(tr) > 1:
+        cl_prev = cl[:-1]
+        tr[1:] = np.maximum.reduce([tr[1:], np.abs(hi[1:] - cl_prev), np.abs(lo[1:] - cl_prev)])
+    out["ATR_14"] = pd.Series(tr, index=df.index).rolling(14).mean()
 
     # 8. 1-bar momentum (redundant but explicit)
     out["Mom_1"] = out["Return"]
@@ -3,18 +3,92 @@
 Usage:
     from logger_setup import get_logger
     log = get_logger(__name__)          # in any script
+
+Log calls merge the message with its %-args (QueueHandler.prepare) and
+enqueue the record; a single background QueueListener applies the
+formatters and does the console/file IO, so disk latency stays off the hot
+path (e.g. run_once inside a sweep).
 """
 
+import atexit
 import logging
 import os
+import queue
 import sys
 from datetime import date
+from logging.handlers import QueueHandler, QueueListener
+from multiprocessing import util as mp_util
 from pathlib import Path
 
 LOG_DIR = Path("logs")
 LOG_DIR.mkdir(exist_ok=True)
 
 
+class _RoutedQueueHandler(QueueHandler):
+    """QueueHandler that stamps records with the logger it is attached to,
+    so records propagated up from child loggers (``pkg.sub``) still reach
+    that logger's console/file handlers."""
+
+    def __init__(self, q: queue.Queue, route: str) -> None:
+        super().__init__(q)
+        self.route = route
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = super().prepare(record)
+        record.route = self.route
+        return record
+
+
+class _Router(logging.Handler):
+    """Listener-side handler: pass each record to the handlers of the logger
+    whose queue handler enqueued it."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.routes: dict[str, list[logging.Handler]] = {}
+
+    def emit(self, record: logging.LogRecord) -> None:
+        for handler in self.routes.get(getattr(record, "route", record.name), ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+_ROUTER = _Router()
+_QUEUE_HANDLERS: list[_RoutedQueueHandler] = []
+_RUNNING = False                # this process's listener thread is started
+
+
+def _start_listener() -> None:
+    """(Re)start the shared queue + listener thread for this process."""
+    global _QUEUE, _LISTENER, _RUNNING
+    _QUEUE = queue.Queue(-1)
+    for qh in _QUEUE_HANDLERS:
+        qh.queue = _QUEUE
+    _LISTENER = QueueListener(_QUEUE, _ROUTER)
+    _LISTENER.start()
+    _RUNNING = True
+
+
+def _stop_listener() -> None:
+    # atexit and the multiprocessing finalizer can both fire in a child
+    global _RUNNING
+    if _RUNNING:
+        _RUNNING = False
+        _LISTENER.stop()
+
+
+def _restart_in_child() -> None:
+    # a forked child gets the queue but not the listener thread; start a
+    # fresh pair and drain it when multiprocessing shuts the child down
+    _start_listener()
+    mp_util.Finalize(None, _stop_listener, exitpriority=100)
+
+
+_start_listener()
+atexit.register(_stop_listener)
+os.register_at_fork(after_in_child=_restart_in_child)
+
+
 def _new_file_handler(script_name: str) -> logging.Handler:
     """Return a FileHandler logs/<script>_YYYY-MM-DD.log (append mode)."""
     logfile = LOG_DIR / f"{script_name}_{date.today()}.log"
@@ -44,7 +118,10 @@ def get_logger(name: str | None = None) -> logging.Logger:
     fh = _new_file_handler(script)
     fh.setFormatter(logging.Formatter("%(asctime)s  %(message)s"))
 
-    logger.addHandler(ch)
-    logger.addHandler(fh)
+    # Both run on the listener thread; the logger itself only enqueues
+    _ROUTER.routes[logger.name] = [ch, fh]
+    qh = _RoutedQueueHandler(_QUEUE, logger.name)
+    _QUEUE_HANDLERS.append(qh)
+    logger.addHandler(qh)
     logger.propagate = False   # stop double logging through root
     return logger
@@ -1,19 +1,20 @@
-"""Train LightGBM classifier (no per-symbol z-scaling)."""
+"""Train LightGBM binary booster (no per-symbol z-scaling)."""
 
 from __future__ import annotations
 import os
 from collections import Counter
 
-import joblib
+import lightgbm as lgb
+from joblib import Parallel, delayed
 import numpy as np
+import pandas as pd
 from sklearn.metrics import accuracy_score, classification_report
-from lightgbm import LGBMClassifier
 from sklearn.model_selection import train_test_split
 from logger_setup import get_logger
 
 from config import MODEL_DIR, MODEL_PATH
 from data_ingestion import load_price_data
-from feature_engineering import compute_features
+from feature_cache import get_features
 
 log = get_logger(__name__)
 
@@ -24,52 +25,75 @@ FEATURE_COLS = [
 ]
 LOW_Q, HIGH_Q = 0.30, 0.70   # quantile labels
 
+# ── LightGBM settings (lgb.train parameter names) ─────────────────────
+DEFAULT_LGBM_PARAMS = dict(
+    objective="binary",
+    learning_rate=0.05,
+    num_leaves=63,
+    subsample=0.8,
+    colsample_bytree=0.8,
+    is_unbalance=True,
+    num_threads=os.cpu_count(),
+    seed=42,
+    verbose=-1,
+    max_bin=255,
+    force_col_wise=True,         # ← better for wide data
+    reuse_hist=True,             # ← reduces memory use + faster
+)
+NUM_BOOST_ROUND = 600
+
+
+def _one_ticker(tkr, df):
+    """Features + quantile labels for one ticker, or None if nothing is labelled."""
+    feats = get_features(tkr, df)
+    fut_ret = df["Close"].pct_change().shift(-1).reindex(feats.index)
+    lo, hi = fut_ret.quantile(LOW_Q), fut_ret.quantile(HIGH_Q)
+    r = fut_ret.to_numpy()
+    labels = pd.Series(np.where(r > hi, 1, np.where(r < lo, -1, 0)).astype(np.int8),
+                       index=fut_ret.index)
+    mask = labels != 0
+    if not mask.any():
+        return None
+    X = feats.loc[mask, FEATURE_COLS].to_numpy(dtype=np.float32, copy=False)
+    return X, labels[mask].to_numpy(dtype=np.int8)
+
 
 def prepare_dataset():
-    X_parts, y_parts = [], []
-    for tkr, df in load_price_data().items():
-        feats = compute_features(df)
-        fut_ret = df["Close"].pct_change().shift(-1).reindex(feats.index)
-        lo, hi = fut_ret.quantile(LOW_Q), fut_ret.quantile(HIGH_Q)
-        labels = fut_ret.apply(lambda r: 1 if r > hi else (-1 if r < lo else 0))
-        mask = labels != 0
-        if mask.any():
-            X_parts.append(feats.loc[mask, FEATURE_COLS].values)
-            y_parts.append(labels[mask].values)
-    X = np.vstack(X_parts)
+    # tickers are independent → one task each; results come back in order
+    results = Parallel(n_jobs=-1)(
+        delayed(_one_ticker)(tkr, df) for tkr, df in load_price_data().items()
+    )
+    X_parts, y_parts = zip(*[r for r in results if r is not None])
+    # float32 halves the hand-off to LightGBM; it bins to ≤255 levels anyway
+    X = np.ascontiguousarray(np.vstack(X_parts), dtype=np.float32)
     y = np.concatenate(y_parts)
     log.info("Class distribution: %s", Counter(y))
     return X, y
 
 
-def train():
+def train(params: dict | None = None, num_boost_round: int = NUM_BOOST_ROUND):
+    """Fit the binary booster; *params* override ``DEFAULT_LGBM_PARAMS``."""
     X, y = prepare_dataset()
     X_tr, X_va, y_tr, y_va = train_test_split(
         X, y, test_size=0.2, stratify=y, random_state=42
     )
+    del X, y
 
-    clf = LGBMClassifier(
-        n_estimators=600,
-        learning_rate=0.05,
-        num_leaves=63,
-        subsample=0.8,
-        colsample_bytree=0.8,
-        objective="binary",
-        is_unbalance=True,
-        n_jobs=-1,
-        random_state=42,
-        verbose=-1,
-        force_col_wise=True,         # ← better for wide data
-        reuse_hist=True,             # ← reduces memory use + faster
-    )
-    clf.fit(X_tr, y_tr)
+    params = {**DEFAULT_LGBM_PARAMS, **(params or {})}
+    # binary objective wants 0/1 targets; free_raw_data lets LightGBM
+    # drop its reference to X_tr once the histograms are binned
+    train_ds = lgb.Dataset(X_tr, (y_tr == 1).astype(np.int8), free_raw_data=True)
+    val_ds = lgb.Dataset(X_va, (y_va == 1).astype(np.int8),
+                         reference=train_ds, free_raw_data=True)
+    del X_tr
+    booster = lgb.train(params, train_ds, num_boost_round=num_boost_round, valid_sets=[val_ds])
 
-    y_pred = clf.predict(X_va)
+    y_pred = np.where(booster.predict(X_va) > 0.5, 1, -1)
     log.info("Validation accuracy: %.3f", accuracy_score(y_va, y_pred))
     log.info("\n%s", classification_report(y_va, y_pred))
 
     os.makedirs(MODEL_DIR, exist_ok=True)
-    joblib.dump(clf, MODEL_PATH)
+    booster.save_model(MODEL_PATH)
     log.info("Model saved ➜ %s", MODEL_PATH)
 
 
@@ -0,0 +1,50 @@
+# scripts/build_kernels.py
+"""Compile every numba kernel into its on-disk cache ahead of the first run.
+
+The kernels are ``@njit(cache=True)``, so once this has run (after install,
+or after a numba/Python upgrade) backtests and sweeps load native code
+instead of JIT-compiling on their first bar.  Each kernel is called through
+its normal entry point with the argument types production uses.
+
+    python -m scripts.build_kernels
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_ingestion import _aggregate
+from feature_engineering import INDICATOR_LINES, compute_features, indicator_lines
+from strategy import _Indicators, _fill_rows
+from utils._njit import HAVE_NUMBA
+
+
+def _sample_bars(n: int = 500) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 1e-3, n)))
+    idx = pd.date_range("2024-01-02 09:31", periods=n, freq="1min", name="Date")
+    return pd.DataFrame({"Open": close, "High": close * 1.001, "Low": close * 0.999,
+                         "Close": close, "Volume": rng.integers(100, 10_000, n).astype(float)},
+                        index=idx)
+
+
+def build() -> None:
+    if not HAVE_NUMBA:
+        print("numba not installed – nothing to compile")
+        return
+    from numba.typed import List
+
+    t0 = time.perf_counter()
+    bars = _sample_bars()
+    _aggregate(bars, 5)                                   # _ohlc_bins
+    compute_features(bars)                                # _features_loop
+    lines = indicator_lines(bars)                         # _indicator_lines_nb …
+    cols = List([np.ascontiguousarray(lines[list(INDICATOR_LINES)].to_numpy(np.float32).T)])
+    X = np.empty((1, 13), dtype=np.float32)
+    _fill_rows(X, np.zeros(1, dtype=bool), cols, np.array([len(bars) - 1], dtype=np.int64),
+               _Indicators.WARMUP, np.float64(0.0), np.float64(1.0))
+    print(f"Kernels compiled and cached in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    build()
@@ -0,0 +1,34 @@
+# scripts/convert_universe.py
+"""Write a one-column (``symbol``) Parquet copy next to each universe CSV.
+
+utils.data_cache.universe_tickers prefers the Parquet copy when it is at
+least as new as its CSV, so sweep processes skip CSV tokenising.  Up-to-date
+copies are skipped; re-run after refresh_universe.
+
+    python -m scripts.convert_universe
+"""
+from pathlib import Path
+
+import pandas as pd
+
+from config import UNIVERSE_DIR
+
+
+def convert(universe_dir: str = UNIVERSE_DIR) -> None:
+    files = sorted(Path(universe_dir).glob("*.csv"))
+    done = 0
+    for fp in files:
+        out = fp.with_suffix(".parquet")
+        if out.exists() and out.stat().st_mtime_ns >= fp.stat().st_mtime_ns:
+            continue
+        df = pd.read_csv(fp, usecols=["symbol"])
+        tmp = out.with_suffix(".tmp")
+        df.to_parquet(tmp, engine="pyarrow", index=False,
+                      compression="zstd", row_group_size=2048)
+        tmp.replace(out)
+        done += 1
+    print(f"Converted {done} of {len(files)} universe files in {universe_dir}")
+
+
+if __name__ == "__main__":
+    convert()
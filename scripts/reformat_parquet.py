@@ -0,0 +1,35 @@
+# scripts/reformat_parquet.py
+"""Rewrite DATA_DIR parquet files with a DatetimeIndex named ``Date``.
+
+load_price_data reads converted files straight into an indexed frame – no
+column renames, no date parsing, no set_index.  Already converted files are
+skipped, so it is safe to re‑run after new downloads.
+
+    python -m scripts.reformat_parquet
+"""
+from pathlib import Path
+
+import pandas as pd
+
+from config import DATA_DIR
+from data_ingestion import _norm_cols
+
+
+def reformat(data_dir: str = DATA_DIR) -> None:
+    files = sorted(Path(data_dir).glob("*.parquet"))
+    done = 0
+    for fp in files:
+        df = pd.read_parquet(fp, engine="pyarrow")
+        if isinstance(df.index, pd.DatetimeIndex) and df.index.name == "Date":
+            continue
+        df = _norm_cols(df)
+        df = df.set_index(pd.DatetimeIndex(pd.to_datetime(df.pop("Date")), name="Date"))
+        tmp = fp.with_suffix(".tmp")
+        df.to_parquet(tmp, engine="pyarrow", index=True)
+        tmp.replace(fp)
+        done += 1
+    print(f"Reformatted {done} of {len(files)} files in {data_dir}")
+
+
+if __name__ == "__main__":
+    reformat()
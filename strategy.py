@@ -2,30 +2,83 @@
 
 Key upgrades
 ------------
-* MIN_EDGE filter: trade only if |p − 0.5| ≥ MIN_EDGE
-* Single trailing stop attached after entry (notify_order)
+* MIN_EDGE filter: trade only if |p − 0.5| ≥ MIN_EDGE (min_edge=0 disables)
+* Optional trailing stop attached after each fill (stop_on_fill), sized in
+  percent or in ATRs (atr_trail)
+* Optional per-sector cap on picks (sector_cap + sectors mapping)
 * Cleans duplicate target_pct logic
 """
 
 from __future__ import annotations
-import math
+import os
+from functools import lru_cache
 from typing import Dict, List
 
 import numpy as np
-import pandas as pd
 import backtrader as bt
-import joblib
+import lightgbm as lgb
 
-from config import MODEL_PATH, MAX_POSITION_PCT, CASH_BUFFER_PCT, MIN_EDGE
+from config import (MODEL_PATH, MAX_POSITION_PCT, CASH_BUFFER_PCT, MIN_EDGE,
+                    MAX_SECTOR_POSITIONS)
+from feature_engineering import INDICATOR_LINES
+from utils._njit import HAVE_NUMBA, njit
+
+if HAVE_NUMBA:
+    from numba.typed import List as _NbList
+
+
+def load_booster(path: str = MODEL_PATH) -> lgb.Booster:
+    """Parse the saved model once per process; every strategy run shares it.
+    Keyed on the file's mtime too, so a retrain in the same process is seen."""
+    return _parse_booster(path, os.stat(path).st_mtime_ns)
+
+
+@lru_cache(maxsize=2)
+def _parse_booster(path: str, mtime_ns: int) -> lgb.Booster:
+    return lgb.Booster(model_file=path)
+
+
+class _VWAPGap(bt.Indicator):
+    """close / rolling VWAP − 1 (NaN while the window has no volume)."""
+    lines = ("vg",)
+    params = dict(period=20)
+
+    def __init__(self):
+        pv  = bt.ind.SumN(self.data.close * self.data.volume, period=self.p.period)
+        vol = bt.ind.SumN(self.data.volume, period=self.p.period)
+        vwap = bt.DivByZero(pv, vol, zero=float("nan"))
+        self.lines.vg = self.data.close / vwap - 1
+
+
+class IndicatorFeed(bt.feeds.PandasData):
+    """PandasData carrying ``indicator_lines(dataname)`` for the strategy.
+
+    The frame is computed once per feed and reused by every run on it;
+    ``indicator_block`` is the same data as a C-contiguous float32
+    ``(len(INDICATOR_LINES), n_bars)`` array for the JIT row fill.
+    """
+    params = (("indicators", None), ("indicator_block", None))
 
 
 class _Indicators(bt.Indicator):
     lines = ("sma5", "sma20", "rsi14",
              "bb_upper", "bb_lower",
              "ret1", "ret2", "ret5",
-             "atr14", "mom1")
+             "atr14", "mom1", "vg")
+
+    WARMUP = 20          # longest window below (SMA/BB/VWAP); RSI/ATR need 15
 
     def __init__(self):
+        self._pre = None
+        pre = getattr(self.data.p, "indicators", None)
+        if pre is not None:
+            # precomputed columns, in self.lines order (mom1 is ret1)
+            src = {ln: pre[ln].to_numpy() for ln in INDICATOR_LINES}
+            src["mom1"] = src["ret1"]
+            self._pre = [src[ln] for ln in self.lines.getlinealiases()]
+            self.addminperiod(self.WARMUP)
+            return
+
         self.lines.sma5  = bt.ind.SMA(self.data.close, period=5)
         self.lines.sma20 = bt.ind.SMA(self.data.close, period=20)
         self.lines.rsi14 = bt.ind.RSI(self.data.close, period=14)
@@ -37,6 +90,55 @@ class _Indicators(bt.Indicator):
         self.lines.ret5 = (self.data.close / self.data.close(-5)) - 1
         self.lines.atr14 = bt.ind.ATR(self.data, period=14)
         self.lines.mom1  = self.lines.ret1
+        self.lines.vg    = _VWAPGap(self.data, period=20).vg
+
+    # ---- precomputed path: copy columns instead of running the graph ----
+    def once(self, start, end):
+        if self._pre is None:
+            return
+        if self.buflen() != len(self._pre[0]):
+            raise ValueError(f"{self.data._name}: indicators cover {len(self._pre[0])} "
+                             f"bars but the feed loaded {self.buflen()}")
+        for line, src in zip(self.lines, self._pre):
+            # float64 view on the line's array.array; numpy upcasts in place
+            np.frombuffer(line.array, dtype=np.float64)[start:end] = src[start:end]
+
+    def next(self):
+        if self._pre is None:
+            return
+        i = len(self) - 1
+        for line, src in zip(self.lines, self._pre):
+            line[0] = src[i]
+
+
+@njit(cache=True, nogil=True)
+def _fill_rows(X, valid, cols, pos, warmup, tod_sin, tod_cos):
+    """Write this bar's feature row for every feed straight from the
+    precomputed ``(len(INDICATOR_LINES), n_bars)`` column blocks.
+
+    ``pos[i]`` is feed i's current bar; rows still warming up or holding a
+    NaN are marked invalid.  No fastmath: the NaN tests must survive.
+    """
+    for i in range(X.shape[0]):
+        p = pos[i]
+        valid[i] = False
+        if p < warmup - 1:
+            continue
+        c = cols[i]
+        ok = True
+        for j in range(10):
+            if c[j, p] != c[j, p]:
+                ok = False
+                break
+        if not ok:
+            continue
+        for j in range(9):                 # sma5 … atr14
+            X[i, j] = c[j, p]
+        X[i, 9] = c[5, p]                  # Mom_1 is Return_1
+        X[i, 10] = tod_sin
+        X[i, 11] = tod_cos
+        X[i, 12] = c[9, p]                 # VWAP_gap
+        valid[i] = True
 
 
 class MLProbabilisticStrategy(bt.Strategy):
@@ -48,6 +150,11 @@ class MLProbabilisticStrategy(bt.Strategy):
         trail_percent=0.04,
         min_edge=MIN_EDGE,
         trade_shorts=True,
+        stop_on_fill=False,      # trailing stop after every entry fill
+        atr_trail=False,         # …trailing atr_mult × ATR14 instead of trail_percent
+        atr_mult=2.0,
+        sector_cap=False,        # ≤ MAX_SECTOR_POSITIONS picks per sector and side
+        sectors=None,            # {ticker: sector}; unmapped tickers are uncapped
     )
 
     FEATURE_COLS: List[str] = [
@@ -57,74 +164,139 @@ class MLProbabilisticStrategy(bt.Strategy):
     ]
 
     def __init__(self):
-        self.model = joblib.load(MODEL_PATH)
+        self.model = self._booster = load_booster(MODEL_PATH)
         self.ind: Dict[bt.DataBase, _Indicators] = {d: _Indicators(d) for d in self.datas}
         self.entry_orders: Dict[bt.DataBase, bt.Order] = {}
         self.stop_orders: Dict[bt.DataBase, bt.Order] = {}
+        # persistent feature matrix: row i belongs to self.datas[i] for the
+        # whole run; float32 like the training matrix, scored once per bar
+        self._X = np.empty((len(self.datas), len(self.FEATURE_COLS)), dtype=np.float32, order="C")
+        self._valid = np.zeros(len(self.datas), dtype=bool)
+        # sin/cos of every minute-of-day, indexed by hour*60 + minute
+        ang = 2 * np.pi * np.arange(1440) / 1440
+        self._tod_lut = np.stack([np.sin(ang), np.cos(ang)], axis=1)
+        # every feed precomputed → fill X in one JIT call per bar from the
+        # blocks prepare_feeds built once per feed (the list only references them)
+        self._cols = None
+        blocks = [getattr(d.p, "indicator_block", None) for d in self.datas]
+        if HAVE_NUMBA and all(b is not None for b in blocks):
+            self._cols = _NbList(blocks)
+
+    def stop(self):
+        # typed Lists don't pickle; optstrategy ships the strategy (via its
+        # OptReturn analyzers) back from worker processes after the run
+        self._cols = None
 
     # ---- attach one trailing stop after fill ---------------------
     def notify_order(self, order: bt.Order):
+        if not self.p.stop_on_fill or order.status != order.Completed:
+            return
+        d = order.data
+        entry = self.entry_orders.get(d)
+        if entry is None or entry.ref != order.ref:     # notifications are clones
+            return
+        del self.entry_orders[d]
+
+        # one live stop per feed, covering the whole position after the fill
+        self._cancel_stop(d)
+        pos = self.getposition(d).size
+        if not pos:
+            return
+        atr = self.ind[d].atr14[0]
+        if self.p.atr_trail and atr == atr:
+            trail = dict(trailamount=self.p.atr_mult * atr)
+        else:
+            trail = dict(trailpercent=self.p.trail_percent)
+        self.stop_orders[d] = (self.sell if pos > 0 else self.buy)(
+            d, size=abs(pos), exectype=bt.Order.StopTrail, **trail)
 
-        #temporarily do nothing while trailing stop is commented out
-        return
-
-        #commenting out trailing stop
-        # if order.status != order.Completed:
-        #     return
-        # d = order.data
-        # if self.entry_orders.get(d) is order:
-        #     tp = self.p.trail_percent
-        #     stop = (self.sell if order.size > 0 else self.buy)(
-        #         d, exectype=bt.Order.StopTrail,
-        #         trailpercent=tp, parent=order)
-        #     self.stop_orders[d] = stop
-        #     del self.entry_orders[d]
+    def _cancel_stop(self, d):
+        stop = self.stop_orders.pop(d, None)
+        if stop is not None and stop.alive():
+            self.cancel(stop)
+
+    # ---- selection --------------------------------------------
+    def _top_k(self, idx, probs, mask, key, k) -> List[bt.DataBase]:
+        """Feeds of the *k* smallest *key* among rows passing *mask*, in key order."""
+        cand = np.flatnonzero(mask)
+        if self.p.sector_cap:
+            # the cap may skip picks, so rank every candidate and walk down
+            cand = cand[np.argsort(key[cand], kind="stable")]
+            return self._cap_sectors([self.datas[i] for i in idx[cand]], k)
+        if cand.size > k:
+            # O(N) partial select; ties at the k-th key go to the lowest
+            # feed index, as a stable sort of every candidate would
+            if k <= 0:
+                return []
+            kc = key[cand]
+            kth = np.partition(kc, k - 1)[k - 1]
+            below = cand[kc < kth]
+            cand = np.concatenate([below, cand[kc == kth][:k - below.size]])
+        cand = cand[np.argsort(key[cand], kind="stable")]
+        return [self.datas[i] for i in idx[cand]]
+
+    def _cap_sectors(self, ranked: List[bt.DataBase], k: int) -> List[bt.DataBase]:
+        """First *k* of *ranked* with at most MAX_SECTOR_POSITIONS per sector."""
+        sectors = self.p.sectors or {}
+        picked: List[bt.DataBase] = []
+        count: Dict[str, int] = {}
+        for d in ranked:
+            if len(picked) >= k:
+                break
+            sec = sectors.get(d._name)
+            if sec is not None:
+                if count.get(sec, 0) >= MAX_SECTOR_POSITIONS:
+                    continue
+                count[sec] = count.get(sec, 0) + 1
+            picked.append(d)
+        return picked
 
     # ---- main step ----------------------------------------------
     def next(self):
         if len(self) < self.p.min_bars:
             return
 
-        scores = []
-        for d in self.datas:
-            ind = self.ind[d]
-            ts = d.datetime.datetime(0)
-            mins = ts.hour * 60 + ts.minute
-            tod_sin = math.sin(2 * math.pi * mins / 1440)
-            tod_cos = math.cos(2 * math.pi * mins / 1440)
-
-            # 20-bar VWAP gap
-            if len(d) >= 20:
-                pv = sum(d.close[-i] * d.volume[-i] for i in range(20))
-                vol = sum(d.volume[-i] for i in range(20))
-                vwap_gap = d.close[0] / (pv / vol) - 1 if vol else np.nan
-            else:
-                vwap_gap = np.nan
-
-            feats = [ind.sma5[0], ind.sma20[0], ind.rsi14[0],
-                     ind.bb_upper[0], ind.bb_lower[0],
-                     ind.ret1[0], ind.ret2[0], ind.ret5[0],
-                     ind.atr14[0], ind.mom1[0],
-                     tod_sin, tod_cos, vwap_gap]
-
-            if np.isnan(feats).any():
-                continue
-
-            p_up = self.model.predict_proba(
-                pd.DataFrame([feats], columns=self.FEATURE_COLS))[0, 1]
-            scores.append((d, p_up))
+        # all feeds share the bar's timestamp → one TOD lookup per bar
+        ts = self.datas[0].datetime.datetime(0)
+        tod_sin, tod_cos = self._tod_lut[ts.hour * 60 + ts.minute]
+
+        X, valid = self._X, self._valid
+        if self._cols is not None:
+            pos = np.fromiter(map(len, self.datas), np.int64, len(self.datas)) - 1
+            _fill_rows(X, valid, self._cols, pos, _Indicators.WARMUP, tod_sin, tod_cos)
+            idx = np.flatnonzero(valid)
+        else:
+            for i, d in enumerate(self.datas):
+                ind = self.ind[d]
+                s20 = ind.sma20[0]
+                if s20 != s20:          # NaN → still warming up; skip the row work
+                    valid[i] = False
+                    continue
+                X[i] = (ind.sma5[0], s20, ind.rsi14[0],
+                        ind.bb_upper[0], ind.bb_lower[0],
+                        ind.ret1[0], ind.ret2[0], ind.ret5[0],
+                        ind.atr14[0], ind.mom1[0],
+                        tod_sin, tod_cos, ind.vg[0])
+                valid[i] = True
 
+            # one vectorised NaN test for every row instead of one per feed
+            idx = np.flatnonzero(valid & ~np.isnan(X).any(axis=1))
+        if not idx.size:
+            return
+
+        # binary objective → Booster.predict gives P(up) directly
+        probs = self._booster.predict(
+            X if idx.size == len(X) else X[idx],
+            num_iteration=self._booster.best_iteration)
+
+        k = self.p.max_long_short
         if self.p.trade_shorts:
-            shorts = [d for d, p in scores
-                    if p <= self.p.p_short and (0.5 - p) >= self.p.min_edge]
-            shorts = sorted(shorts, key=lambda d: dict(scores)[d])[: self.p.max_long_short]
+            shorts = self._top_k(idx, probs, (probs <= self.p.p_short)
+                                 & (0.5 - probs >= self.p.min_edge), probs, k)
         else:
             shorts = []
-        
-        longs  = [d for d,p in scores
-                  if p >= self.p.p_long  and (p - 0.5) >= self.p.min_edge]
-
-        longs  = sorted(longs,  key=lambda d: -dict(scores)[d])[: self.p.max_long_short]
+        longs = self._top_k(idx, probs, (probs >= self.p.p_long)
+                            & (probs - 0.5 >= self.p.min_edge), -probs, k)
 
         if not longs and not shorts:
             return
@@ -136,8 +308,10 @@ class MLProbabilisticStrategy(bt.Strategy):
         for d in self.datas:
             pos = self.getposition(d).size
             if pos > 0 and d not in longs:
+                self._cancel_stop(d)
                 self.close(d)
             elif pos < 0 and d not in shorts:
+                self._cancel_stop(d)
                 self.close(d)
 
         # ---- open / rebalance -----------------------------------
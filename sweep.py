@@ -3,15 +3,29 @@ Memory-safe multiprocess parameter sweep
 ---------------------------------------
 Example:
     python sweep.py --workers 4 --universes top200 top100 top50
+    python sweep.py --workers 4 --universes top50 --trials 20   # Optuna TPE
+    python sweep.py --workers 4 --config sweep_configs/a.yml sweep_configs/b.yml
+
+Each ``--config`` YAML overrides the grid/window/output below (see
+sweep_configs/); several run back-to-back on the same warm worker pools.
 """
 
-import csv, argparse, time
+import atexit, csv, argparse, time
+import hashlib, json, os, pickle, subprocess
+import multiprocessing as mp
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
 from itertools import product
 from pathlib import Path
-from multiprocessing import Process, Queue
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import config
+from config import MODEL_PATH, PROJECT_ROOT, SWEEP_CACHE_DIR
 from logger_setup import get_logger
-from utils.sweep_worker import worker    # <== new helper
+from utils.data_cache import data_stamp, universe_tickers
+from utils.sweep_worker import grid_min_bars, init_worker, run_index, universe_feeds
 
 log = get_logger(__name__)
 
@@ -34,7 +48,148 @@ param_grid = {
 
 WIN_START = "2018-01-01"
 WIN_END   = "2024-12-31"
-CSV_PATH  = Path("logs/experiment_results_full.csv")
+OUT_PATH  = Path("logs/experiment_results_full.parquet")   # or .csv
+STUDY_DB  = "sqlite:///logs/sweep.db"          # Optuna storage (resumable)
+OBJECTIVE = "net_after_tax"                    # metric the search maximises
+RESULT_TYPES = {                               # run_once's metrics
+    "start": pa.timestamp("ns"), "end": pa.timestamp("ns"),
+    "final": pa.float64(), "sharpe": pa.float64(), "mdd": pa.float64(),
+    "trades": pa.int64(), "cagr": pa.float64(),
+    "gross_pnl": pa.float64(), "tax_paid": pa.float64(), "net_after_tax": pa.float64(),
+}
+ROW_GROUP = 64                                 # Parquet rows per row group
+
+class ResultWriter:
+    """Streams sweep result rows to *path*: Parquet (zstd, typed schema) or,
+    for a ``.csv`` path, a line-buffered CSV.  Failed rows leave nulls."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.schema = pa.schema(
+            [("universe", pa.string())]
+            + [(k, pa.array(v).type) for k, v in param_grid.items()]
+            + list(RESULT_TYPES.items()))
+        self._rows = []
+
+    def __enter__(self):
+        self.path.parent.mkdir(exist_ok=True)
+        if self.path.suffix == ".csv":
+            self._f = self.path.open("w", newline="", buffering=1)
+            self._csv = csv.DictWriter(self._f, fieldnames=self.schema.names)
+            self._csv.writeheader()
+        else:
+            self._pq = pq.ParquetWriter(self.path, self.schema, compression="zstd")
+        return self
+
+    def write(self, row):
+        if self.path.suffix == ".csv":
+            self._csv.writerow(row)
+            return
+        self._rows.append(row)
+        if len(self._rows) >= ROW_GROUP:
+            self._flush()
+
+    def _flush(self):
+        if self._rows:
+            self._pq.write_table(pa.Table.from_pylist(self._rows, schema=self.schema))
+            self._rows.clear()
+
+    def __exit__(self, *exc):
+        if self.path.suffix == ".csv":
+            self._f.close()
+        else:
+            self._flush()
+            self._pq.close()
+
+# persistent per-universe pools, kept for the whole session so repeated
+# main()/optimize() calls (e.g. from a notebook) skip worker start-up.
+# The grid is broadcast once through the initializer and tasks carry only
+# its index; a new grid replaces the universe's pool (forked workers
+# inherit the parent's feeds, so the restart is cheap).
+_POOLS = {}                     # key → (grid, executor)
+_CPU_SLOT = mp.Value("i", 0)    # next CPU for init_worker to pin a worker to
+DEBUG = False                   # workers log every run (--debug)
+
+def _pool(universe, n_workers, grid, broken=None):
+    """The universe's pool for *grid*; *broken* is an executor that raised
+    BrokenProcessPool and is replaced if it is still the registered one."""
+    key = (universe, ticker_files[universe], WIN_START, WIN_END, n_workers)
+    old_grid, ex = _POOLS.get(key, (None, None))
+    if ex is not None and (old_grid != grid or ex is broken):   # crashes poison a pool
+        ex.shutdown(wait=False, cancel_futures=True)
+        ex = None
+    if ex is None:
+        ex = ProcessPoolExecutor(
+            max_workers=n_workers, initializer=init_worker,
+            initargs=(universe, ticker_files[universe], WIN_START, WIN_END,
+                      _CPU_SLOT, grid, DEBUG))
+        _POOLS[key] = (grid, ex)
+    return ex
+
+@atexit.register
+def shutdown_pools():
+    for _, ex in _POOLS.values():
+        ex.shutdown(cancel_futures=True)
+    _POOLS.clear()
+
+# ---- finished-config memo ------------------------------------------------
+# one pickle per (universe, cfg incl. window, code rev, model, input data,
+# risk settings) under SWEEP_CACHE_DIR, so a rerun or resumed sweep skips
+# finished points
+MEMO_SETTINGS = ("INITIAL_CASH", "MAX_POSITION_PCT", "CASH_BUFFER_PCT",
+                 "MAX_SECTOR_POSITIONS", "MIN_EDGE")   # config values a run reads
+
+def _code_rev():
+    # taken once per main()/optimize() call, so a commit or retrain between
+    # calls in one session changes the keys
+    try:
+        rev = subprocess.run(["git", "rev-parse", "HEAD"], cwd=PROJECT_ROOT,
+                             capture_output=True, text=True).stdout.strip()
+    except OSError:
+        rev = ""
+    model = os.stat(MODEL_PATH).st_mtime_ns if os.path.exists(MODEL_PATH) else 0
+    return f"{rev or '-'}|{model}"
+
+@lru_cache(maxsize=None)
+def _data_stamp(universe, tickers_csv):
+    # taken once per session, like the panel the runs are built on
+    return data_stamp(universe_tickers(universe, tickers_csv))
+
+def _memo_file(universe, cfg, rev):
+    blob = json.dumps({"_u": universe, "_tickers": ticker_files[universe],
+                       "_rev": rev,
+                       "_data": _data_stamp(universe, ticker_files[universe]),
+                       "_cfg": {k: getattr(config, k) for k in MEMO_SETTINGS},
+                       **cfg}, sort_keys=True, default=str)
+    return Path(SWEEP_CACHE_DIR) / f"{hashlib.sha256(blob.encode()).hexdigest()}.pkl"
+
+def _store(fp, fut):
+    if fut.cancelled() or fut.exception() is not None:
+        return
+    row = fut.result()
+    if row.get("final") is None:              # failed/empty runs get retried
+        return
+    fp.parent.mkdir(parents=True, exist_ok=True)
+    tmp = fp.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_bytes(pickle.dumps(row, protocol=pickle.HIGHEST_PROTOCOL))
+    tmp.replace(fp)
+
+def _submit(universe, n_workers, grid, i, rev, force=False):
+    """Future for grid point *i*'s row: the memoised one unless *force*, else
+    a run on the universe's pool whose row is memoised when it finishes.
+    *rev* is the caller's ``_code_rev()``."""
+    fp = _memo_file(universe, grid[i], rev)
+    if not force and fp.exists():
+        fut = Future()
+        fut.set_result(pickle.loads(fp.read_bytes()))
+        return fut
+    pool = _pool(universe, n_workers, grid)
+    try:
+        fut = pool.submit(run_index, i)
+    except BrokenProcessPool:                 # a worker died since the last task
+        fut = _pool(universe, n_workers, grid, broken=pool).submit(run_index, i)
+    fut.add_done_callback(lambda f: _store(fp, f))
+    return fut
 
 # ------------------------------------------------------------------------
 def build_tasks():
@@ -45,52 +200,151 @@ def build_tasks():
         cfg["_end"]   = WIN_END
         yield cfg
 
-def main(universes, n_workers):
-    task_q, result_q = Queue(), Queue()
+def _failed_row(universe, cfg):
+    # the row run_one writes for a failed run, for runs whose worker died
+    return {"universe": universe, **{k: cfg[k] for k in param_grid}, "final": None}
 
-    # enqueue ALL configs for each universe
+def main(universes, n_workers, force=False):
+    if not universes:
+        raise ValueError("main: no universes to sweep")
+    grid = tuple(build_tasks())
+    tasks = [(u, i) for u in universes for i in range(len(grid))]
+    total_tasks = len(tasks)
+
+    # load each universe and compute its indicators once, up front: forked
+    # workers inherit the feeds instead of rebuilding them per process
     for u in universes:
-        for cfg in build_tasks():
-            task_q.put(cfg)
-        task_q.put(None)     # poison pill for that worker
-
-    # start one worker per universe (bounded by --workers)
-    procs = []
-    for u in universes[:n_workers]:
-        p = Process(target=worker,
-                    args=(u, ticker_files[u], task_q, result_q),
-                    daemon=True)
-        p.start()
-        procs.append(p)
-
-    # incremental CSV write
-    CSV_PATH.parent.mkdir(exist_ok=True)
-    wrote_header = False
-    finished = 0
-    total_tasks = len(universes)*len(list(build_tasks()))
-    with CSV_PATH.open("w", newline="") as f:
-        writer = None
-        while finished < total_tasks:
-            res = result_q.get()
-            if writer is None:
-                writer = csv.DictWriter(f, fieldnames=res.keys())
-                writer.writeheader()
-                wrote_header = True
-            writer.writerow(res); f.flush()
-            finished += 1
-            if finished % 10 == 0:
-                log.info("%d / %d done (%0.1f%%)",
-                         finished, total_tasks,
-                         100*finished/total_tasks)
-
-    for p in procs:
-        p.join()
+        universe_feeds(u, ticker_files[u], WIN_START, WIN_END, grid_min_bars(grid))
+
+    # one pool per universe: its workers build that universe's feeds once in
+    # the initializer and keep them for every config (and every later sweep)
+    per_universe = max(1, n_workers // len(universes))
+    # stream rows into a fixed schema as each config finishes
+    with ResultWriter(OUT_PATH) as writer:
+        rev = _code_rev()
+        pending = {_submit(u, per_universe, grid, i, rev, force): (u, i)
+                   for u, i in tasks}
+        retried = set()
+        every = max(1, total_tasks // 100)   # ≤ 100 progress lines per sweep
+        finished = 0
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                u, i = pending.pop(fut)
+                try:
+                    row = fut.result()        # run_one turns failures into rows
+                except BrokenProcessPool:
+                    # a worker died: the pool is rebuilt on resubmit; a config
+                    # that kills it twice is recorded as failed
+                    if (u, i) not in retried:
+                        retried.add((u, i))
+                        pending[_submit(u, per_universe, grid, i, rev, force)] = (u, i)
+                        continue
+                    log.error("Fail %s : worker died", grid[i])
+                    row = _failed_row(u, grid[i])
+                writer.write(row)
+                finished += 1
+                if finished % every == 0 or finished == total_tasks:
+                    log.info("%d / %d done (%0.1f%%)",
+                             finished, total_tasks,
+                             100*finished/total_tasks)
+
+def _study_name(universe):
+    # Optuna pins each parameter's choices on a stored study, so a changed
+    # grid (or changed risk settings) must open a new study, not the old one
+    blob = json.dumps({"grid": param_grid,
+                       "cfg": {k: getattr(config, k) for k in MEMO_SETTINGS}},
+                      sort_keys=True, default=str)
+    digest = hashlib.sha256(blob.encode()).hexdigest()[:12]
+    return f"sweep_{universe}_{WIN_START}_{WIN_END}_{digest}"
+
+def optimize(universes, n_workers, n_trials, force=False):
+    """Bayesian (Optuna TPE) search over ``param_grid`` instead of the full
+    product: *n_trials* runs per universe, maximising ``OBJECTIVE``.
+
+    Trials are asked/told from this process and run on a persistent
+    per-universe pool like the grid's, ``n_workers`` at a time.  Studies live in
+    ``STUDY_DB`` under one name per universe/window/grid, so a rerun resumes.
+    """
+    import optuna                  # optional: only the --trials mode needs it
+
+    grid = tuple(build_tasks())
+    index = {tuple(cfg[k] for k in param_grid): i for i, cfg in enumerate(grid)}
+    rev = _code_rev()
+    with ResultWriter(OUT_PATH) as writer:
+        for u in universes:
+            universe_feeds(u, ticker_files[u], WIN_START, WIN_END, grid_min_bars(grid))
+            study = optuna.create_study(
+                study_name=_study_name(u), storage=STUDY_DB,
+                direction="maximize", load_if_exists=True)
+            running, asked = {}, 0
+            while asked < n_trials or running:
+                while asked < n_trials and len(running) < n_workers:
+                    trial = study.ask()
+                    # the grid's value lists become the trial's choices
+                    i = index[tuple(trial.suggest_categorical(k, v)
+                                    for k, v in param_grid.items())]
+                    running[_submit(u, n_workers, grid, i, rev, force)] = trial, i
+                    asked += 1
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    trial, i = running.pop(fut)
+                    try:
+                        row = fut.result()
+                    except BrokenProcessPool:     # next submit rebuilds the pool
+                        log.error("Fail %s : worker died", grid[i])
+                        row = _failed_row(u, grid[i])
+                    writer.write(row)
+                    if row.get(OBJECTIVE) is None:
+                        study.tell(trial, state=optuna.trial.TrialState.FAIL)
+                    else:
+                        study.tell(trial, row[OBJECTIVE])
+            log.info("%s: best %s=%.2f with %s", u, OBJECTIVE,
+                     study.best_value, study.best_params)
+
+
+def load_config(path):
+    """Apply one sweep_configs YAML to the module settings; returns its
+    ``(universes, trials)`` (None where the file leaves them unset)."""
+    import yaml                    # optional: only --config needs it
+    global param_grid, WIN_START, WIN_END, OUT_PATH
+
+    with open(path) as f:
+        cfg = yaml.safe_load(f) or {}
+    param_grid = cfg.get("param_grid", param_grid)
+    WIN_START  = str(cfg.get("win_start", WIN_START))
+    WIN_END    = str(cfg.get("win_end", WIN_END))
+    OUT_PATH   = Path(cfg.get("out_path", OUT_PATH))
+    return cfg.get("universes"), cfg.get("trials")
+
+
+def run(universes, n_workers, trials=0, force=False):
+    if trials:
+        optimize(universes, n_workers, trials, force)
+    else:
+        main(universes, n_workers, force)
+
 
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
     ap.add_argument("--workers", type=int, default=4,
-                    help="Max parallel universes")
+                    help="Worker processes, split evenly across universes (≥1 each)")
     ap.add_argument("--universes", nargs="+",
                     default=list(ticker_files.keys()))
+    ap.add_argument("--trials", type=int, default=0,
+                    help="Optuna trials per universe instead of the full grid (0 = grid)")
+    ap.add_argument("--config", nargs="+", default=[],
+                    help="sweep_configs/*.yml files, run in order in this process")
+    ap.add_argument("--force", action="store_true",
+                    help="Re-run configs even if a finished result is cached")
+    ap.add_argument("--debug", action="store_true",
+                    help="Log every run from the workers (quiet by default)")
     args = ap.parse_args()
-    main(args.universes, args.workers)
+    DEBUG = args.debug
+    if not args.config:
+        run(args.universes, args.workers, args.trials, args.force)
+    for path in args.config:
+        universes, trials = load_config(path)
+        log.info("Sweep config %s ➜ %s", path, OUT_PATH)
+        run(universes or args.universes, args.workers,
+            args.trials if trials is None else trials, args.force)
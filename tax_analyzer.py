@@ -1,3 +1,5 @@
+import math
+
 import backtrader as bt
 
 class TaxAnalyzer(bt.Analyzer):
@@ -7,9 +9,15 @@ class TaxAnalyzer(bt.Analyzer):
     def start(self):
         self.pnl = 0.0
 
-    def notify_trade(self, trade):
-        if trade.isclosed:
-            self.pnl += trade.pnlcomm     # already net of comm/slippage
+    def stop(self):
+        # one pass over the strategy's trade book instead of a callback per
+        # closed trade; pnlcomm is already net of comm/slippage
+        self.pnl = math.fsum(
+            t.pnlcomm
+            for by_id in self.strategy._trades.values()
+            for trades in by_id.values()
+            for t in trades if t.isclosed
+        )
 
     def get_analysis(self):
         tax = max(0.0, self.pnl) * self.p.rate
@@ -17,4 +25,4 @@ class TaxAnalyzer(bt.Analyzer):
             "gross_pnl": self.pnl,
             "tax_paid": tax,
             "net_after_tax": self.pnl - tax,
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,67 @@
+"""sweep.optimize: the Optuna study survives a rerun with a different grid.
+
+Runs without market data or a model: the pool/panel plumbing is patched out
+and each grid point's "run" scores its own parameters.
+
+    python -m unittest discover tests
+"""
+import sys
+import tempfile
+import unittest
+from concurrent.futures import Future
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import sweep  # noqa: E402
+
+
+def _fake_submit(universe, n_workers, grid, i, rev, force=False):
+    cfg = grid[i]
+    fut = Future()
+    fut.set_result({"universe": universe,
+                    **{k: cfg[k] for k in sweep.param_grid},
+                    "final": 1.0, sweep.OBJECTIVE: cfg["p_long"] - cfg["p_short"]})
+    return fut
+
+
+class OptimizeGridChangeTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        for name, value in {
+            "STUDY_DB": f"sqlite:///{self.tmp / 'sweep.db'}",
+            "OUT_PATH": self.tmp / "results.parquet",
+            "ticker_files": {"u": "u.csv"},
+        }.items():
+            patcher = mock.patch.object(sweep, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        for name, fake in {"universe_feeds": mock.Mock(), "_submit": _fake_submit}.items():
+            patcher = mock.patch.object(sweep, name, fake)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _optimize(self, grid):
+        with mock.patch.object(sweep, "param_grid", grid):
+            sweep.optimize(["u"], 1, 3)
+
+    def _study_name(self, grid):
+        with mock.patch.object(sweep, "param_grid", grid):
+            return sweep._study_name("u")
+
+    def test_rerun_with_changed_grid(self):
+        old = {"p_long": [0.6, 0.62], "p_short": [0.4]}
+        new = {"p_long": [0.6, 0.65, 0.7], "p_short": [0.4]}
+        self._optimize(old)
+        self._optimize(new)        # used to raise: dynamic value space
+        self.assertNotEqual(self._study_name(old), self._study_name(new))
+        # key order doesn't matter, so the same grid resumes its own study
+        self.assertEqual(self._study_name(old),
+                         self._study_name({"p_short": [0.4], "p_long": [0.6, 0.62]}))
+
+
+if __name__ == "__main__":
+    unittest.main()
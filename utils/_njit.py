@@ -0,0 +1,18 @@
+# utils/_njit.py
+"""
+Optional numba JIT.
+
+`njit` is numba's decorator when numba is installed and a no-op otherwise,
+so kernel modules always import.  Callers check `HAVE_NUMBA` to pick the
+JIT path or their plain pandas/NumPy fallback.
+"""
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda fn: fn
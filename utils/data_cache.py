@@ -0,0 +1,108 @@
+"""Per-universe price panel cache for sweeps.
+
+``load_panel(universe, start, end)`` returns the ``load_price_panel`` tuple
+``(names, times, ohlcv)`` for the universe's tickers.  Two levels:
+
+* L1 – ``lru_cache`` in the current process;
+* L2 – a pickle under ``PANEL_CACHE_DIR`` shared by every process/run,
+  keyed by sha256 of universe|start|end plus ``data_stamp`` (tickers, their
+  parquet mtimes, DATA_DIR, RESAMPLE_MINUTES, data_ingestion source), so
+  refreshed price files, edited ticker lists or loader changes miss it.
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import pickle
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backtesting import _window
+from config import PANEL_CACHE_DIR, UNIVERSE_DIR
+import data_ingestion
+from data_ingestion import _PARQUET_PATHS, load_price_panel
+from logger_setup import get_logger
+
+log = get_logger(__name__)
+
+Panel = Tuple[List[str], pd.DatetimeIndex, np.ndarray]
+
+
+def _read_sequential(path) -> bytes:
+    """Whole file in one read, hinting sequential access (larger readahead)
+    where the OS supports posix_fadvise."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        size = os.fstat(fd).st_size
+        with os.fdopen(fd, "rb", closefd=False) as f:
+            return f.read(size)
+    finally:
+        os.close(fd)
+
+
+def universe_tickers(universe_name: str, tickers_csv: Optional[str] = None) -> List[str]:
+    """Symbols listed in ``tickers_csv`` (default ``UNIVERSE_DIR/<name>.csv``).
+
+    A sibling ``.parquet`` written by scripts/convert_universe is read
+    instead when it is at least as new as the CSV.
+    """
+    path = Path(tickers_csv or os.path.join(UNIVERSE_DIR, f"{universe_name}.csv"))
+    pq = path.with_suffix(".parquet")
+    if pq.exists() and (path == pq or not path.exists()
+                        or pq.stat().st_mtime_ns >= path.stat().st_mtime_ns):
+        return pd.read_parquet(pq, columns=["symbol"], memory_map=True)["symbol"].tolist()
+    return pd.read_csv(io.BytesIO(_read_sequential(path)), usecols=["symbol"])["symbol"].tolist()
+
+
+_CODE_DIGEST = hashlib.blake2b(
+    Path(data_ingestion.__file__).read_bytes(), digest_size=8
+).hexdigest()
+
+
+def data_stamp(tickers: List[str]) -> str:
+    """Everything a loaded panel depends on besides the window: the ticker
+    list, their parquet mtimes, DATA_DIR/RESAMPLE_MINUTES as data_ingestion
+    sees them, and the data_ingestion source (cleaning/aggregation)."""
+    stamps = "|".join(
+        str(fp.stat().st_mtime_ns) if (fp := _PARQUET_PATHS.get(t)) and fp.exists() else "-"
+        for t in tickers
+    )
+    return (f"{data_ingestion.DATA_DIR}|{data_ingestion.RESAMPLE_MINUTES}|{_CODE_DIGEST}"
+            f"|{','.join(tickers)}|{stamps}")
+
+
+def _key(universe_name: str, start: Optional[str], end: Optional[str],
+         tickers: List[str]) -> str:
+    return hashlib.sha256(
+        f"{universe_name}|{start}|{end}|{data_stamp(tickers)}".encode()
+    ).hexdigest()
+
+
+@lru_cache(maxsize=8)
+def load_panel(
+    universe_name: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    tickers_csv: Optional[str] = None,
+) -> Panel:
+    """Price panel for one universe/window; see the module docstring."""
+    tickers = universe_tickers(universe_name, tickers_csv)
+    fp = Path(PANEL_CACHE_DIR) / f"panel_{_key(universe_name, start, end, tickers)}.pkl"
+    if fp.exists():
+        return pickle.loads(_read_sequential(fp))
+
+    panel = load_price_panel(tickers, *_window(start, end))
+    fp.parent.mkdir(parents=True, exist_ok=True)
+    tmp = fp.with_suffix(f".{os.getpid()}.tmp")       # workers may race here
+    with tmp.open("wb") as f:
+        pickle.dump(panel, f, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp.replace(fp)
+    log.info("Cached %s panel (%d tickers) ➜ %s", universe_name, len(panel[0]), fp)
+    return panel
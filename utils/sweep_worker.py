@@ -1,44 +1,115 @@
 """
-A single worker process: loads one universe into memory ONCE,
-then executes many run_once() calls sent via multiprocessing Queue.
+Sweep task run inside a pool worker: each process loads a universe into
+memory ONCE, then re-runs one Cerebro (backtesting.Session) against it for
+every config.
 """
-import sys, pickle, queue
-from multiprocessing import Queue
-from backtesting import run_once
+from __future__ import annotations
+
+import logging
+import os
+from functools import lru_cache
+from threadpoolctl import threadpool_limits
+from backtesting import BROKER_PARAMS, Session, _empty_result, _window, prepare_feeds
+from config import MODEL_PATH
+from strategy import load_booster
+from utils.data_cache import load_panel
 from logger_setup import get_logger
-import pandas as pd
 
 log = get_logger(__name__)
 
-def worker(universe_name: str, tickers_csv: str,
-           task_q: Queue, result_q: Queue):
-    tickers = pd.read_csv(tickers_csv)["symbol"].tolist()
-    log.info("Worker %s loaded %d tickers", universe_name, len(tickers))
-
-    while True:
-        try:
-            cfg = task_q.get(timeout=5)
-        except queue.Empty:
-            continue
-        if cfg is None:        # poison pill → shut down
-            break
-        try:
-            # REMOVE the special keys before expanding cfg
-            start = cfg.pop("_start")
-            end   = cfg.pop("_end")
-
-            # Now call run_once with clean kwargs
-            res = run_once(
-                **cfg,
-                start_date=start,
-                end_date=end,
-                tickers=tickers,
-            )
-
-            # Build your result row
-            result_q.put({"universe": universe_name, **cfg, **res})
-
-        except Exception as e:
-            log.error("Fail %s : %s", cfg, e)
-            result_q.put({"universe": universe_name, **cfg,
-                          "final": None})
+
+# set by init_worker: the pool's universe and the grid run_index() indexes
+_UNIVERSE: tuple = (None, None)
+_GRID: tuple = ()
+
+
+def init_worker(universe_name: str | None = None, tickers_csv: str | None = None,
+                start: str | None = None, end: str | None = None,
+                cpu_slot=None, grid: tuple = (),
+                debug: bool = False) -> None:
+    """Pool initializer: pin to one thread (and, given a shared *cpu_slot*
+    counter, to one CPU), load the model and – for a per-universe pool –
+    that universe's feeds before the first task.  *grid* is kept so tasks
+    can name their config by index (see run_index).  Per-run log lines are
+    only emitted with *debug*."""
+    global _UNIVERSE, _GRID
+    _UNIVERSE, _GRID = (universe_name, tickers_csv), grid
+    level = logging.DEBUG if debug else logging.WARNING
+    for name in ("backtesting", __name__):
+        logging.getLogger(name).setLevel(level)
+    threadpool_limits(1)        # N workers × all-core OpenMP pools would oversubscribe
+    if cpu_slot is not None and hasattr(os, "sched_setaffinity"):
+        # round-robin over the CPUs we may use; keeps each worker's caches warm
+        with cpu_slot.get_lock():
+            slot = cpu_slot.value
+            cpu_slot.value += 1
+        cpus = sorted(os.sched_getaffinity(0))
+        os.sched_setaffinity(0, {cpus[slot % len(cpus)]})
+    load_booster(MODEL_PATH)
+    if universe_name is not None:
+        universe_feeds(universe_name, tickers_csv, start, end, grid_min_bars(grid))
+
+
+def grid_min_bars(grid) -> int:
+    """Smallest ``min_bars`` any config in *grid* asks for (run_once's 30
+    where unset): feeds are built at that and each config runs on the ones
+    with at least its own ``min_bars``."""
+    return min((cfg.get("min_bars", 30) for cfg in grid), default=30)
+
+
+@lru_cache(maxsize=4)
+def universe_feeds(universe_name: str, tickers_csv: str, start: str, end: str,
+                   min_bars: int = 30):
+    """Feeds (OHLCV + precomputed indicators) for one universe/window,
+    dropping tickers with fewer than *min_bars* bars as ``run_once`` does.
+
+    Nothing else here depends on strategy params, so every config in the
+    grid reuses the same feeds; only the Cerebro run is repeated.  Built once
+    per process – sweep.main calls it before forking so workers inherit them.
+    """
+    panel = load_panel(universe_name, start, end, tickers_csv)
+    feeds = prepare_feeds(None, *_window(start, end), min_bars, panel=panel)
+    log.info("%s: loaded %d tickers (%d feeds)",
+             universe_name, len(panel[0]), len(feeds))
+    return panel[0], feeds
+
+
+@lru_cache(maxsize=8)
+def _session(universe_name: str, tickers_csv: str, start: str, end: str,
+             broker: tuple, min_bars: int) -> Session | None:
+    """The worker's Cerebro for one universe/window, broker settings and
+    ``min_bars``; every config that shares them re-runs it (None: no feeds)."""
+    _, feeds = universe_feeds(universe_name, tickers_csv, start, end,
+                              min(min_bars, grid_min_bars(_GRID)))
+    # the tickers run_once would keep for this min_bars
+    feeds = [f for f in feeds if len(f.p.dataname) >= min_bars]
+    if not feeds:
+        return None
+    return Session(feeds, *_window(start, end), dict(broker))
+
+
+def run_one(universe_name: str, tickers_csv: str, cfg: dict) -> dict:
+    """Back-test one config on one universe; returns the CSV result row."""
+    cfg = dict(cfg)
+    try:
+        # REMOVE the special keys before expanding cfg
+        start = cfg.pop("_start")
+        end   = cfg.pop("_end")
+        broker = tuple((k, cfg[k]) for k in BROKER_PARAMS if k in cfg)
+        session = _session(universe_name, tickers_csv, start, end, broker,
+                           cfg.get("min_bars", 30))
+
+        res = (session.run(**cfg) if session is not None
+               else _empty_result(*_window(start, end)))
+        log.debug("%s %s → final %s", universe_name, cfg, res["final"])
+        return {"universe": universe_name, **cfg, **res}
+
+    except Exception as e:
+        log.error("Fail %s : %s", cfg, e)
+        return {"universe": universe_name, **cfg, "final": None}
+
+
+def run_index(i: int) -> dict:
+    """run_one for config ``_GRID[i]`` on this pool's universe; the task
+    pickles one int instead of a cfg dict."""
+    return run_one(*_UNIVERSE, _GRID[i])
@@ -1,29 +1,54 @@
 # utils/trade_recorder.py
 from __future__ import annotations
 import backtrader as bt
-from datetime import datetime
+import numpy as np
+import pandas as pd
+
 
 class TradeRecorder(bt.Analyzer):
     """
-    Collect every *closed* trade in a list of dicts.
-    The analysis dict looks like:  {"trades": [ {...}, {...}, ... ]}
+    Collect every *closed* trade into preallocated column arrays.
+    The analysis dict looks like:  {"trades": DataFrame}  (one row per trade)
     """
+    CAPACITY = 1024                 # initial rows; doubled when full
+
     def start(self):
-        self._records = []
+        n = self.CAPACITY
+        self._dt = np.empty(n, dtype="datetime64[ns]")
+        self._ticker = np.empty(n, dtype=object)
+        self._size = np.empty(n, dtype=np.int64)
+        self._px_in = np.empty(n, dtype=np.float64)
+        self._px_out = np.empty(n, dtype=np.float64)
+        self._pnl = np.empty(n, dtype=np.float64)
+        self._n = 0
+
+    def _grow(self):
+        for name in ("_dt", "_ticker", "_size", "_px_in", "_px_out", "_pnl"):
+            col = getattr(self, name)
+            setattr(self, name, np.concatenate([col, np.empty_like(col)]))
 
     def notify_trade(self, trade: bt.Trade):
         if not trade.isclosed:
             return
-        bar_dt = self.strategy.datas[0].datetime.datetime()
-        self._records.append({
-            "datetime": bar_dt,               # bar that closed the trade
-            "ticker":   trade.data._name,
-            "size":     trade.size,
-            "price_in": trade.price,
-            "price_out": trade.price + trade.pnlcomm / trade.size
-                         if trade.size else None,
-            "pnl":      trade.pnlcomm,
-        })
+        if self._n == self._dt.size:
+            self._grow()
+        i = self._n
+        self._dt[i] = self.strategy.datas[0].datetime.datetime()   # bar that closed it
+        self._ticker[i] = trade.data._name
+        self._size[i] = trade.size
+        self._px_in[i] = trade.price
+        self._px_out[i] = (trade.price + trade.pnlcomm / trade.size
+                           if trade.size else np.nan)
+        self._pnl[i] = trade.pnlcomm
+        self._n = i + 1
 
     def get_analysis(self):
-        return {"trades": self._records}
+        n = self._n
+        return {"trades": pd.DataFrame({
+            "datetime":  self._dt[:n],
+            "ticker":    self._ticker[:n],
+            "size":      self._size[:n],
+            "price_in":  self._px_in[:n],
+            "price_out": self._px_out[:n],
+            "pnl":       self._pnl[:n],
+        })}